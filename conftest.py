@@ -0,0 +1,9 @@
+# pytest, run from the repository root: tests live next to the service modules
+# they test (services/*/test_*.py, test_pipeline.py here); the shared modules
+# are in services/common, which the images put on PYTHONPATH
+import pathlib, sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent / "services" / "common"))
+
+# Earlier prototypes (scripts, not tests, e.g. news-feed-proto/news_feed_test.py)
+collect_ignore_glob = ["news-feed-proto*", "NewsJuice-Pipeline_MS_2*", "API learning"]
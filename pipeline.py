@@ -0,0 +1,353 @@
+'''
+Single-process pipeline runner
+
+Runs the services of `make run` (scrape, load, retrieve, summarize) in one
+Python process instead of one container each. The stages form a DAG: a
+stage starts as soon as the stages it depends on are done, independent
+stages run in parallel threads, and results are handed over in memory:
+
+  scrape ----> chunk ----> load ----> retrieve ----> summarize
+  warmup ------^            ^                   \\--> sync (--sync)
+  wait_db ------------------/
+
+* scrape -> chunk: the scraped articles (scraper.scrape()), no news.jsonl
+  round trip
+* chunk -> load: load() still reads the chunk files, which carry its
+  resume checkpoints (see services/loader/schema.py)
+* retrieve -> summarize: result records (retriever.search_records(),
+  services/common/results.py), no top-2.jsonl round trip
+* warmup imports the loader's heavy libraries while the feed is fetched;
+  wait_db waits for the database once, alongside both
+* with summaries on load (SUMMARIZE_ON_LOAD) and the pg summary cache,
+  chunk already uses the database, so it waits for wait_db too (as does
+  summarize)
+
+Library imports, the DB wait and the model clients happen once per run,
+and metrics.py reports all stages in one summary (plus stage_<name>
+wall times).
+
+The artifacts (news.jsonl, top-2.jsonl) are still written for inspection
+and sync, unless --no-artifacts.
+
+Daemon mode (--daemon) keeps ingesting instead: it polls each feed of
+SCRAPER_FEEDS when it is due (a poll budget split between the feeds by
+their publish cadence, see services/scraper/feeds.py), fetches only
+entries it has not ingested yet, and chunks and loads the new articles
+right away (only the chunk files written since the last load, not the whole
+chunk folder). Between polls the process sleeps until the next feed is due,
+at most INGEST_MAX_IDLE_S.
+SIGTERM / Ctrl-C stop it after the round in progress.
+
+Usage (services' dependencies installed, DATABASE_URL pointing at the
+Cloud SQL proxy):
+  python pipeline.py --query "science and health"
+  python pipeline.py --serial          # one stage at a time
+  python pipeline.py --stages scrape,chunk
+  python pipeline.py --daemon
+'''
+
+import argparse, importlib.abc, importlib.util, os, pathlib, signal, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+ROOT = pathlib.Path(__file__).resolve().parent
+SERVICES = ("common", "scraper", "loader", "retriever", "summarizer")
+
+
+class ServiceModules(importlib.abc.MetaPathFinder):
+    """Imports the services' top-level modules from their files.
+
+    Each service imports its siblings by plain name (`from schema import
+    ...`), as in its own container. Putting every service directory on
+    sys.path would let a module of one service (or an installed package of
+    the same name) shadow another's; instead each name maps to exactly one
+    file, found before sys.path, and a name defined by two services is an
+    error. Shared modules (metrics.py, logs.py, tokens.py, ...) live in
+    services/common.
+    """
+
+    def __init__(self, services=SERVICES):
+        self.paths = {}
+        for service in services:
+            for path in sorted((ROOT / "services" / service).glob("*.py")):
+                if path.stem.startswith("test_"):
+                    continue
+                other = self.paths.setdefault(path.stem, path)
+                if other != path:
+                    raise ImportError(f"module {path.stem!r} is defined in both "
+                                      f"{other.parent.name} and {service}")
+
+    def find_spec(self, name, path=None, target=None):
+        if path is None and name in self.paths:
+            return importlib.util.spec_from_file_location(name, self.paths[name])
+        return None
+
+
+sys.meta_path.insert(0, ServiceModules())
+
+from metrics import metrics
+from logs import get_logger
+
+log = get_logger("pipeline")
+
+DB_URL = os.environ.get("DATABASE_URL", "")
+DB_WAIT_TIMEOUT = float(os.getenv("DB_WAIT_TIMEOUT", "20"))
+PATH_TO_PREFERENCES = pathlib.Path("/data/preferences.txt")
+CHUNK_METHOD = os.environ.get("CHUNK_METHOD", "semantic-split")
+INGEST_RETRY_S = float(os.getenv("INGEST_RETRY_S", "60"))  # wait after a failed round
+INGEST_MAX_IDLE_S = float(os.getenv("INGEST_MAX_IDLE_S", "900"))  # longest sleep between rounds
+
+# Imported by the warmup stage while the feed is being fetched
+WARM_MODULES = ("pandas", "langchain.text_splitter", "langchain_experimental.text_splitter",
+                "google.genai", "psycopg", "pgvector.psycopg")
+
+
+class Stage:
+
+    def __init__(self, name, fn, deps=()):
+        self.name, self.fn, self.deps = name, fn, tuple(deps)
+
+
+def run_dag(stages, parallel=True):
+    """Runs stages in dependency order; returns {name: result}.
+
+    fn receives {dep name: dep result}. With parallel=False the stages run
+    one at a time, in the order given. A failed stage stops the run: the
+    stages already running finish, nothing else starts, the error is raised.
+    """
+    names = {s.name for s in stages}
+    for s in stages:
+        missing = [d for d in s.deps if d not in names]
+        if missing:
+            raise ValueError(f"stage {s.name} depends on unknown stage(s) {missing}")
+
+    results, pending, running = {}, list(stages), {}
+    failed = None
+
+    def timed(stage, inputs):
+        log.info("stage %s: start", stage.name)
+        t0 = time.perf_counter()
+        out = stage.fn(inputs)
+        elapsed = time.perf_counter() - t0
+        metrics.observe(f"stage_{stage.name}", elapsed)
+        log.info("stage %s: done in %.1f s", stage.name, elapsed)
+        return out
+
+    with ThreadPoolExecutor(max_workers=max(len(stages), 1) if parallel else 1) as pool:
+        while pending or running:
+            if failed is None:
+                for stage in [s for s in pending if all(d in results for d in s.deps)]:
+                    pending.remove(stage)
+                    inputs = {d: results[d] for d in stage.deps}
+                    running[pool.submit(timed, stage, inputs)] = stage.name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as ex:
+                    log.error("stage %s failed :: %s", name, ex)
+                    failed = failed or ex
+    if failed is not None:
+        raise failed
+    if pending:
+        raise ValueError(f"stages never became ready: {[s.name for s in pending]}")
+    return results
+
+
+def wait_for_db(url=DB_URL, timeout=DB_WAIT_TIMEOUT):
+    """Same check as the services' wait_for_db.py, once for the whole run."""
+    import psycopg
+    deadline = time.time() + timeout
+    while True:
+        try:
+            with psycopg.connect(url, connect_timeout=5):
+                log.info("db: reachable")
+                return
+        except Exception as ex:
+            if time.time() >= deadline:
+                raise TimeoutError(f"timed out waiting for the DB ({ex.__class__.__name__})")
+            log.info("db: not ready yet: %s", ex.__class__.__name__)
+            time.sleep(2)
+
+
+def warmup():
+    import importlib
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as ex:
+            log.debug("warmup: %s not importable :: %s", name, ex)
+
+
+def cache_in_db():
+    """True when the summary cache (cache.py) is the pg one."""
+    from cache import SUMMARIZER_CACHE
+    return SUMMARIZER_CACHE == "pg"
+
+
+def build_stages(search_text, briefing, artifacts=True, sync=False):
+    import loader, scraper
+
+    def scrape(_):
+        items = scraper.scrape()
+        if artifacts and items:
+            scraper.write_news(items)
+        return items
+
+    def summarize(inputs):
+        import summarizer
+        records = inputs.get("retrieve")
+        if records is None:  # run without the retrieve stage: use its last artifact
+            records = summarizer.read_results()
+        articles = summarizer.build_context(records)
+        if not articles:
+            log.warning("no retrieved articles for %r", search_text)
+            return ""
+        return summarizer.brief(articles, briefing)
+
+    def retrieve(_):
+        import retriever
+        records = retriever.search_records(search_text)
+        if artifacts:
+            retriever.write_results(records)
+        return records
+
+    def push(_):
+        from sync import push
+        if not push():
+            raise RuntimeError("sync: some artifacts were not pushed (see the errors above)")
+
+    db_stages = loader.LOADER_BACKEND != "local"
+    # Summary cache in the DB: chunk (summaries on load) and summarize connect too
+    db_cache = cache_in_db()
+    stages = [
+        Stage("scrape", scrape),
+        Stage("warmup", lambda _: warmup()),
+        Stage("chunk", lambda i: loader.chunk(CHUNK_METHOD, news=i.get("scrape")),
+              deps=("scrape", "warmup") + (("wait_db",) if db_cache and loader.SUMMARIZE_ON_LOAD else ())),
+    ]
+    if db_stages or db_cache:
+        stages.append(Stage("wait_db", lambda _: wait_for_db()))
+    if db_stages:
+        stages.append(Stage("load", lambda _: loader.load(), deps=("chunk", "wait_db")))
+    stages += [
+        Stage("retrieve", retrieve, deps=("load",) if db_stages else ("chunk",)),
+        Stage("summarize", summarize, deps=("retrieve",) + (("wait_db",) if db_cache else ())),
+    ]
+    if sync:
+        stages.append(Stage("sync", push, deps=("retrieve",)))
+    return stages
+
+
+def ingest_round(registry, now, pending):
+    """Polls the due feeds, then chunks and loads their new articles.
+
+    pending: chunk files written but not loaded yet. Only those are loaded,
+    not every file in the chunk folder; files of a failed load stay pending
+    for the next round.
+    """
+    import loader, scraper
+    news = []
+    polled = registry.due(now)
+    for feed in polled:
+        seen, published = set(feed.seen), []
+        items = scraper.scrape(feed.url, seen, published)
+        feed.remember(seen)
+        feed.observe(len(items), now, published)
+        news += items
+    # Budget shares follow the updated rates (feeds.py)
+    registry.schedule()
+    for feed in polled:
+        log.info("ingest: %s: %d new, %.1f articles/day, next poll in %.0f s", feed.url,
+                 sum(i["source_link"] == feed.url for i in news), (feed.rate or 0) * 86400, feed.interval)
+    if news:
+        written = loader.chunk(CHUNK_METHOD, news=news)
+        if loader.LOADER_BACKEND != "local":
+            pending.update(written)
+    if pending:
+        loader.load(sorted(pending))
+        pending.clear()
+    if news:
+        metrics.count("ingested", len(news))
+    # Saved last: links of a failed round are not marked ingested
+    registry.save()
+    return len(news)
+
+
+def ingest_daemon(stop):
+    """Runs ingest rounds until stop is set, sleeping until the next feed is due."""
+    import loader, scraper
+    from feeds import FeedRegistry
+    if loader.LOADER_BACKEND != "local" or (loader.SUMMARIZE_ON_LOAD and cache_in_db()):
+        wait_for_db()
+    log.info("ingest: daemon started, %d feeds", len(scraper.FEEDS))
+    if not scraper.FEEDS:
+        log.warning("ingest: SCRAPER_FEEDS is empty, nothing to poll")
+    # Files left unloaded by an earlier run are resumed by the first round's
+    # load (one scan of the chunk folder); after that only new files
+    pending = set(loader.PATH_TO_CHUNKS.glob("*.jsonl")) \
+        if loader.LOADER_BACKEND != "local" else set()
+    while not stop.is_set():
+        registry = FeedRegistry(scraper.FEEDS)
+        try:
+            with metrics.time("ingest_round") as m:
+                m.items = ingest_round(registry, time.time(), pending)
+        except Exception as ex:
+            log.error("ingest: round failed, retrying in %.0f s :: %s", INGEST_RETRY_S, ex)
+            stop.wait(INGEST_RETRY_S)
+            continue
+        # next_poll() is inf without feeds; Event.wait() cannot take that
+        stop.wait(min(INGEST_MAX_IDLE_S, max(0.0, registry.next_poll() - time.time())))
+    log.info("ingest: daemon stopped")
+
+
+def select(stages, names):
+    """The named stages, with dependencies on stages left out dropped."""
+    unknown = set(names) - {s.name for s in stages}
+    if unknown:
+        raise ValueError(f"unknown stage(s) {sorted(unknown)}; stages: {', '.join(s.name for s in stages)}")
+    keep = [s for s in stages if s.name in names]
+    return [Stage(s.name, s.fn, [d for d in s.deps if d in names]) for s in keep]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--query", help="search text (default: /data/preferences.txt, else prompt)")
+    ap.add_argument("--serial", action="store_true", help="run one stage at a time")
+    ap.add_argument("--stages", help="comma-separated subset of stages to run")
+    ap.add_argument("--sync", action="store_true", help="push artifacts to GCS after retrieval")
+    ap.add_argument("--no-artifacts", action="store_true", help="do not write news.jsonl / top-2.jsonl")
+    ap.add_argument("--daemon", action="store_true", help="keep polling the feeds and loading new articles")
+    args = ap.parse_args()
+
+    if args.daemon:
+        stop = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stop.set())
+        ingest_daemon(stop)
+        return
+
+    briefing = PATH_TO_PREFERENCES.read_text(encoding="utf-8").strip() \
+        if PATH_TO_PREFERENCES.exists() else ""
+    search_text = args.query or briefing or input("Search text ? : ")
+
+    t0 = time.perf_counter()
+    stages = build_stages(search_text, briefing or search_text,
+                          artifacts=not args.no_artifacts, sync=args.sync)
+    if args.stages:
+        try:
+            stages = select(stages, set(args.stages.split(",")))
+        except ValueError as ex:
+            ap.error(str(ex))
+    run_dag(stages, parallel=not args.serial)
+    log.info("pipeline finished in %.1f s (%s)", time.perf_counter() - t0,
+             "serial" if args.serial else "parallel")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        metrics.finish()  # per-stage throughput summary, see metrics.py
@@ -0,0 +1,107 @@
+'''
+Summary cache keyed by (article content hash, prompt version, model)
+
+The key does not depend on the user or briefing, so an article is summarized
+once and the summary is reused for every user whose results include it.
+The hash is of the full article text (the scraped content in the loader, the
+article rebuilt from all its chunks in the summarizer; cut to
+SUMMARY_INPUT_TOKENS, see llm.py), never of the chunks a query happened to
+retrieve.
+Used by the summarizer and the loader.
+
+* PgSummaryCache:   summary_cache table in the vector DB, shared by every
+                    container and run
+* FileSummaryCache: JSON lines file (default /data/summary_cache.jsonl),
+                    for local runs without a database
+
+SUMMARIZER_CACHE ---- "pg" or "file"; default "pg" when DATABASE_URL is set
+'''
+
+import contextlib, hashlib, json, os, pathlib
+
+DB_URL = os.environ.get("DATABASE_URL", "")
+SUMMARIZER_CACHE = os.environ.get("SUMMARIZER_CACHE", "pg" if DB_URL else "file")
+CACHE_PATH = pathlib.Path(os.environ.get("SUMMARIZER_CACHE_PATH", "/data/summary_cache.jsonl"))
+
+CREATE_CACHE = """
+CREATE TABLE IF NOT EXISTS summary_cache (
+    content_hash   text NOT NULL,
+    prompt_version text NOT NULL,
+    model          text NOT NULL,
+    summary        text NOT NULL,
+    created_at     timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (content_hash, prompt_version, model)
+);
+"""
+
+
+def content_hash(text):
+    """Hash of the article text, whitespace-normalized."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class FileSummaryCache:
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = pathlib.Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        e = json.loads(line)
+                        self.entries[(e["content_hash"], e["prompt_version"], e["model"])] = e["summary"]
+
+    def get_many(self, hashes, prompt_version, model):
+        return {h: self.entries[(h, prompt_version, model)]
+                for h in hashes if (h, prompt_version, model) in self.entries}
+
+    def put_many(self, summaries, prompt_version, model):
+        """summaries: {content_hash: summary}"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            for h, summary in summaries.items():
+                self.entries[(h, prompt_version, model)] = summary
+                f.write(json.dumps({"content_hash": h, "prompt_version": prompt_version,
+                                    "model": model, "summary": summary}, ensure_ascii=False) + "\n")
+
+
+class PgSummaryCache:
+
+    def __init__(self, conn):
+        self.conn = conn
+        with conn.cursor() as cur:
+            cur.execute(CREATE_CACHE)
+
+    def get_many(self, hashes, prompt_version, model):
+        with self.conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT content_hash, summary FROM summary_cache
+                WHERE content_hash = ANY(%s) AND prompt_version = %s AND model = %s;
+                """,
+                (list(hashes), prompt_version, model),
+            )
+            return dict(cur.fetchall())
+
+    def put_many(self, summaries, prompt_version, model):
+        with self.conn.cursor() as cur:
+            cur.executemany(
+                """
+                INSERT INTO summary_cache (content_hash, prompt_version, model, summary)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT DO NOTHING;
+                """,
+                [(h, prompt_version, model, s) for h, s in summaries.items()],
+            )
+
+
+@contextlib.contextmanager
+def open_cache(kind=SUMMARIZER_CACHE):
+    """with open_cache() as cache: ... (the DB connection is closed on exit)"""
+    if kind == "pg":
+        import psycopg
+        with psycopg.connect(DB_URL, autocommit=True) as conn:
+            yield PgSummaryCache(conn)
+    else:
+        yield FileSummaryCache()
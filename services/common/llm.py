@@ -0,0 +1,157 @@
+'''
+Generative model clients and the article summary prompt
+
+Used by the summarizer and the loader (which precomputes summaries at
+load time), so both use the same prompt and share cached summaries.
+
+Every client has `model`, `async generate(prompt) -> str` and
+`stream(prompt)`, an async generator of text pieces as the model produces
+them:
+
+* GeminiClient: Vertex AI Gemini through google-genai's async API
+  (GENERATIVE_MODEL, default gemini-2.0-flash-001), with retries
+* StubClient:   local, no API; returns the first sentences of the article in
+                the prompt after an optional delay, for tests and offline runs.
+                stream() is a fake streaming model: first piece after
+                SUMMARIZER_STUB_TTFT_S, then one word per SUMMARIZER_STUB_TOKEN_S
+
+summarize_all() summarizes many articles: each text cut to
+SUMMARY_INPUT_TOKENS (tokens.py estimate, at a sentence/word boundary),
+cache lookup by (content hash of the cut text, PROMPT_VERSION, model), one
+call per distinct uncached text, at most `concurrency` calls in flight.
+
+SUMMARIZER_CLIENT      ---- "gemini" (default) or "stub"
+SUMMARIZER_CONCURRENCY ---- max concurrent model calls (default 8)
+SUMMARY_INPUT_TOKENS   ---- max article tokens per summary prompt (default 3000)
+'''
+
+import asyncio, contextlib, os, re
+
+from cache import content_hash
+from tokens import truncate
+
+GENERATIVE_MODEL = os.environ.get("GENERATIVE_MODEL", "gemini-2.0-flash-001")
+SUMMARIZER_CLIENT = os.environ.get("SUMMARIZER_CLIENT", "gemini")
+RETRIES = 3
+STUB_DELAY_S = float(os.environ.get("SUMMARIZER_STUB_DELAY_S", "0"))
+STUB_TTFT_S = float(os.environ.get("SUMMARIZER_STUB_TTFT_S", "0.3"))
+STUB_TOKEN_S = float(os.environ.get("SUMMARIZER_STUB_TOKEN_S", "0.02"))
+
+SUMMARIZER_CONCURRENCY = int(os.environ.get("SUMMARIZER_CONCURRENCY", "8"))
+SUMMARY_INPUT_TOKENS = int(os.environ.get("SUMMARY_INPUT_TOKENS", "3000"))
+
+# Bump when PROMPT changes, so cached summaries from the old prompt are not reused
+PROMPT_VERSION = "v1"
+ARTICLE_MARKER = "ARTICLE:\n"
+PROMPT = (
+    "Summarize the following news article in 3 to 5 sentences for a short "
+    "news briefing. Keep names, numbers and dates; do not add information "
+    "that is not in the article.\n\n"
+    "TITLE: {title}\n" + ARTICLE_MARKER + "{text}"
+)
+
+
+def build_prompt(title, text):
+    return PROMPT.format(title=title, text=text)
+
+
+class GeminiClient:
+
+    def __init__(self, model=GENERATIVE_MODEL):
+        from google import genai
+        project = os.environ.get("GOOGLE_CLOUD_PROJECT")
+        location = os.environ.get("GOOGLE_CLOUD_REGION", "us-central1")
+        self.client = genai.Client(vertexai=True, project=project, location=location)
+        self.model = model
+
+    async def generate(self, prompt):
+        for attempt in range(RETRIES):
+            try:
+                resp = await self.client.aio.models.generate_content(model=self.model, contents=prompt)
+                return (resp.text or "").strip()
+            except Exception:
+                if attempt == RETRIES - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+    async def stream(self, prompt):
+        # No retry: pieces already forwarded cannot be taken back
+        async for chunk in await self.client.aio.models.generate_content_stream(
+                model=self.model, contents=prompt):
+            if chunk.text:
+                yield chunk.text
+
+
+class StubClient:
+    """Extractive stand-in: first `sentences` sentences of the article."""
+
+    model = "stub"
+
+    def __init__(self, sentences=2, delay_s=STUB_DELAY_S, ttft_s=STUB_TTFT_S, token_s=STUB_TOKEN_S):
+        self.sentences = sentences
+        self.delay_s = delay_s
+        self.ttft_s, self.token_s = ttft_s, token_s
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        return self._extract(prompt)
+
+    async def stream(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.ttft_s)
+        for i, word in enumerate(self._extract(prompt).split(" ")):
+            if i:
+                await asyncio.sleep(self.token_s)
+            yield word if i == 0 else " " + word
+
+    def _extract(self, prompt):
+        article = prompt.split(ARTICLE_MARKER, 1)[-1]
+        return " ".join(re.split(r"(?<=[.?!])\s+", article.strip())[:self.sentences])
+
+
+CLIENTS = {"gemini": GeminiClient, "stub": StubClient}
+
+
+def get_client(name=SUMMARIZER_CLIENT):
+    return CLIENTS[name]()
+
+
+async def summarize_all(articles, client, cache, concurrency=SUMMARIZER_CONCURRENCY,
+                        on_call=contextlib.nullcontext, max_tokens=SUMMARY_INPUT_TOKENS):
+    """Summaries for [(title, text)], in order; only cache misses reach the model.
+
+    Each text is cut to max_tokens first, so no prompt outgrows the budget
+    and the cache key is of the text actually summarized.
+
+    A failed call gives None for that article (and is not cached), so one
+    error does not lose the other summaries.
+
+    on_call: context manager factory wrapped around each model call
+    (e.g. metrics timing).
+    """
+    articles = [(title, truncate(text, max_tokens)) for title, text in articles]
+    hashes = [content_hash(text) for _, text in articles]
+    # Cache reads and writes block (DB or file): off the event loop
+    summaries = await asyncio.to_thread(cache.get_many, set(hashes), PROMPT_VERSION, client.model)
+
+    # One call per distinct article text, even if it appears twice
+    misses = {}
+    for h, (title, text) in zip(hashes, articles):
+        if h not in summaries:
+            misses.setdefault(h, (title, text))
+    sem = asyncio.Semaphore(concurrency)
+
+    async def summarize(title, text):
+        async with sem:
+            with on_call():
+                return await client.generate(build_prompt(title, text))
+
+    results = await asyncio.gather(*(summarize(*a) for a in misses.values()), return_exceptions=True)
+    fresh = {h: r for h, r in zip(misses, results) if not isinstance(r, BaseException)}
+    if fresh:
+        await asyncio.to_thread(cache.put_many, fresh, PROMPT_VERSION, client.model)
+    summaries.update(fresh)
+    return [summaries.get(h) for h in hashes]
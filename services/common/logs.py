@@ -0,0 +1,98 @@
+'''
+Logging setup: levels, sampled per-item events and periodic progress
+
+Shared by every service (services/common, on PYTHONPATH). Usage:
+
+    from logs import get_logger, Progress, sampled
+
+    log = get_logger("loader")
+    progress = Progress(log, "rows inserted")
+    for row in rows:
+        ...
+        log.debug("inserted %s", row_id)          # free unless LOG_LEVEL=DEBUG
+        sampled(log, logging.WARNING, "insert-error", "insert failed: %s", ex)
+        progress.update()
+    progress.done()
+
+LOG_LEVEL       ---- DEBUG / INFO (default) / WARNING / ERROR
+LOG_FORMAT      ---- "text" (default) or "json" (one JSON object per line)
+LOG_SAMPLE      ---- sampled() logs the first N events of a kind, then every
+                     Nth (default 10), with the running count
+LOG_PROGRESS_S  ---- seconds between Progress lines (default 5)
+'''
+
+import json, logging, os, sys, time
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_SAMPLE = int(os.environ.get("LOG_SAMPLE", "10"))
+LOG_PROGRESS_S = float(os.environ.get("LOG_PROGRESS_S", "5"))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {"ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"), "level": record.levelname,
+               "logger": record.name, "msg": record.getMessage()}
+        out.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+_configured = False
+
+
+def setup(level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None):
+    """Configures the root logger once (stdout, like the prints it replaces)."""
+    global _configured
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else
+                         logging.Formatter("%(asctime)s %(levelname)-7s [%(name)s] %(message)s",
+                                           "%H:%M:%S"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    _configured = True
+
+
+def get_logger(name):
+    if not _configured:
+        setup()
+    return logging.getLogger(name)
+
+
+_sample_counts = {}
+
+
+def sampled(logger, level, key, msg, *args, every=LOG_SAMPLE):
+    """Logs the first `every` events for key, then one in `every`."""
+    n = _sample_counts.get(key, 0) + 1
+    _sample_counts[key] = n
+    if (n <= every or n % every == 0) and logger.isEnabledFor(level):
+        logger.log(level, msg + " [%s #%d]", *args, key, n)
+
+
+class Progress:
+    """Counts items and logs count and rate at most every interval seconds."""
+
+    def __init__(self, logger, what, total=None, interval=LOG_PROGRESS_S):
+        self.logger, self.what, self.total, self.interval = logger, what, total, interval
+        self.count = 0
+        self.started = self.last = time.monotonic()
+
+    def update(self, n=1):
+        self.count += n
+        now = time.monotonic()
+        if now - self.last >= self.interval:
+            self.last = now
+            self._log(now, "progress")
+
+    def done(self):
+        self._log(time.monotonic(), "done")
+
+    def _log(self, now, state):
+        elapsed = now - self.started
+        rate = self.count / elapsed if elapsed else 0.0
+        of = f"/{self.total}" if self.total else ""
+        self.logger.info("%s: %s %d%s in %.1f s (%.0f/s)", state, self.what, self.count, of, elapsed, rate,
+                         extra={"fields": {"what": self.what, "count": self.count, "rate": rate}})
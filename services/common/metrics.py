@@ -0,0 +1,229 @@
+'''
+Pipeline metrics: per-stage counters and latency histograms
+
+Shared by every service (services/common, on PYTHONPATH). Usage:
+
+    from metrics import metrics
+
+    with metrics.time("embed", items=len(batch)):
+        ...
+    metrics.count("load_errors")
+    metrics.finish()   # end-of-run summary + output below
+
+Stages used by the pipeline: fetch, extract (scraper), dedup, split, embed,
+insert (loader), embed, query, rerank (retriever).
+
+METRICS_FORMAT  ---- "json" (default): one JSON line per stage / counter,
+                     appended to METRICS_OUT (default /data/metrics.jsonl),
+                     so one file collects every service of a `make run`
+                     "prometheus": text exposition format written to
+                     METRICS_OUT (default /data/metrics-<service>.prom)
+                     "off": summary only
+METRICS_PORT    ---- if set, serve /metrics (Prometheus text) on this port
+                     while the process runs
+
+`python metrics.py [/data/metrics.jsonl]` prints the summary of the latest
+run of each service from the JSON lines file.
+'''
+
+import bisect, json, os, pathlib, sys, threading, time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+SERVICE = os.environ.get("METRICS_SERVICE") or pathlib.Path(sys.argv[0]).stem or "python"
+METRICS_FORMAT = os.environ.get("METRICS_FORMAT", "json")
+METRICS_OUT = os.environ.get("METRICS_OUT", "")
+METRICS_PORT = os.environ.get("METRICS_PORT", "")
+
+# Histogram bucket upper bounds in seconds (Prometheus-style, +Inf implied)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Stage:
+    """Latency histogram + item count for one stage."""
+
+    def __init__(self):
+        self.durations = []   # seconds per call
+        self.items = 0
+
+    def observe(self, seconds, items=1):
+        self.durations.append(seconds)
+        self.items += items
+
+    def stats(self):
+        d = sorted(self.durations)
+        total = sum(d)
+        counts = [0] * (len(BUCKETS) + 1)
+        for x in d:
+            counts[bisect.bisect_left(BUCKETS, x)] += 1
+        return {
+            "calls": len(d),
+            "items": self.items,
+            "sum_s": total,
+            "p50_ms": percentile(d, 50) * 1000,
+            "p95_ms": percentile(d, 95) * 1000,
+            "items_per_s": self.items / total if total else None,
+            "buckets": [sum(counts[:i + 1]) for i in range(len(counts))],  # cumulative
+        }
+
+
+def percentile(sorted_values, p):
+    """Linear-interpolated percentile of an ascending list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * p / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class Metrics:
+
+    def __init__(self, service=SERVICE):
+        self.service = service
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self._finished = False
+
+    def observe(self, stage, seconds, items=1):
+        with self.lock:
+            self.stages.setdefault(stage, Stage()).observe(seconds, items)
+
+    @contextmanager
+    def time(self, stage, items=1):
+        """Times the block; set `.items` on the yielded record if only known at the end."""
+        record = _Record(items)
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.observe(stage, time.perf_counter() - t0, record.items)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # ---------- Output ----------
+    def snapshot(self):
+        with self.lock:
+            return ({name: s.stats() for name, s in self.stages.items()}, dict(self.counters))
+
+    def summary(self):
+        stages, counters = self.snapshot()
+        wall = time.perf_counter() - self.started
+        lines = [f"[metrics] {self.service}: {wall:.2f} s wall",
+                 f"{'stage':<14} {'calls':>7} {'items':>8} {'total s':>9} {'% wall':>7} "
+                 f"{'p50 ms':>9} {'p95 ms':>9} {'items/s':>9}"]
+        for name, s in stages.items():
+            rate = f"{s['items_per_s']:.1f}" if s["items_per_s"] else "-"
+            lines.append(f"{name:<14} {s['calls']:>7} {s['items']:>8} {s['sum_s']:>9.2f} "
+                         f"{100 * s['sum_s'] / wall:>6.1f}% {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {rate:>9}")
+        for name, n in counters.items():
+            lines.append(f"{name:<14} {n:>7}")
+        return "\n".join(lines)
+
+    def json_lines(self):
+        stages, counters = self.snapshot()
+        ts = datetime.now(timezone.utc).isoformat()
+        wall = time.perf_counter() - self.started
+        rows = [{"ts": ts, "service": self.service, "stage": name, "wall_s": wall, **s}
+                for name, s in stages.items()]
+        rows += [{"ts": ts, "service": self.service, "counter": name, "value": n}
+                 for name, n in counters.items()]
+        return "".join(json.dumps(r) + "\n" for r in rows)
+
+    def prometheus(self):
+        stages, counters = self.snapshot()
+        out = ["# TYPE newsjuice_stage_seconds histogram",
+               "# TYPE newsjuice_stage_items_total counter",
+               "# TYPE newsjuice_events_total counter"]
+        for name, s in stages.items():
+            labels = f'service="{self.service}",stage="{name}"'
+            for le, c in zip([*BUCKETS, "+Inf"], s["buckets"]):
+                out.append(f'newsjuice_stage_seconds_bucket{{{labels},le="{le}"}} {c}')
+            out.append(f"newsjuice_stage_seconds_sum{{{labels}}} {s['sum_s']}")
+            out.append(f"newsjuice_stage_seconds_count{{{labels}}} {s['calls']}")
+            out.append(f"newsjuice_stage_items_total{{{labels}}} {s['items']}")
+        for name, n in counters.items():
+            out.append(f'newsjuice_events_total{{service="{self.service}",name="{name}"}} {n}')
+        return "\n".join(out) + "\n"
+
+    def serve(self, port):
+        """Prometheus /metrics endpoint in a background thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus().encode()
+                self.send_response(200 if self.path == "/metrics" else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("", int(port)), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def finish(self):
+        """Prints the throughput summary and writes METRICS_FORMAT output (once)."""
+        if self._finished:
+            return
+        self._finished = True
+        print(self.summary())
+        try:
+            if METRICS_FORMAT == "json":
+                path = pathlib.Path(METRICS_OUT or "/data/metrics.jsonl")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open("a", encoding="utf-8") as f:
+                    f.write(self.json_lines())
+            elif METRICS_FORMAT == "prometheus":
+                path = pathlib.Path(METRICS_OUT or f"/data/metrics-{self.service}.prom")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(self.prometheus(), encoding="utf-8")
+        except OSError as ex:
+            print(f"[metrics] could not write output :: {ex}", file=sys.stderr)
+
+
+class _Record:
+    def __init__(self, items):
+        self.items = items
+
+
+metrics = Metrics()
+if METRICS_PORT:
+    metrics.serve(METRICS_PORT)
+
+
+def main():
+    """Summary of the latest run of each service in a metrics JSON lines file."""
+    path = pathlib.Path(sys.argv[1] if len(sys.argv) > 1 else "/data/metrics.jsonl")
+    latest = {}   # service -> rows of its last run
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            rows = latest.setdefault(row["service"], [])
+            if rows and rows[0]["ts"] != row["ts"]:
+                rows.clear()
+            rows.append(row)
+
+    print(f"{'service':<10} {'stage':<14} {'calls':>7} {'items':>8} {'total s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'items/s':>9}")
+    for service, rows in latest.items():
+        for r in rows:
+            if "stage" in r:
+                rate = f"{r['items_per_s']:.1f}" if r["items_per_s"] else "-"
+                print(f"{service:<10} {r['stage']:<14} {r['calls']:>7} {r['items']:>8} {r['sum_s']:>9.2f} "
+                      f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {rate:>9}")
+            else:
+                print(f"{service:<10} {r['counter']:<14} {r['value']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+'''
+Retrieval results artifact: typed JSON lines instead of str(row) dumps
+
+Used by the retriever (writer) and the summarizer (reader).
+
+One JSON object per retrieved chunk, in rank order:
+
+  {"rank": 1, "article_id": "...", "chunk_index": 0, "score": 0.213,
+   "text": "...", "metadata": {"id": 17, "title": "...",
+   "published_at": "2025-09-30T12:00:00+00:00", "source_link": "..."}}
+
+score is the retriever's cosine distance (lower = closer), published_at an
+ISO 8601 string or null. Readers load a line with json.loads (no eval / ast
+of Python reprs), and can stop early or stream thousands of rows.
+
+In process, to_records() is the handoff: its list of dicts is exactly what
+read_results() returns, so a caller holding the retriever's rows can pass
+them to the summarizer without writing or parsing the file.
+
+RESULTS_PATH ---- artifact path (default /data/top-2.jsonl)
+'''
+
+import json, os, pathlib
+from datetime import date, datetime
+
+RESULTS_PATH = pathlib.Path(os.environ.get("RESULTS_PATH", "/data/top-2.jsonl"))
+
+# Row shape returned by the retriever's stores
+ROW_FIELDS = ("id", "article_id", "chunk_index", "title", "chunk", "published_at", "source_link", "score")
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def to_record(row, rank):
+    """One retriever row (tuple in ROW_FIELDS order) as a result record."""
+    r = dict(zip(ROW_FIELDS, row))
+    return {
+        "rank": rank,
+        "article_id": str(r["article_id"]),
+        "chunk_index": int(r["chunk_index"]) if r["chunk_index"] is not None else None,
+        "score": float(r["score"]) if r["score"] is not None else None,
+        "text": r["chunk"] or "",
+        "metadata": {"id": r["id"], "title": r["title"],
+                     "published_at": _iso(r["published_at"]), "source_link": r["source_link"]},
+    }
+
+
+def to_records(rows):
+    return [to_record(row, rank) for rank, row in enumerate(rows, start=1)]
+
+
+def write_results(records, path=RESULTS_PATH):
+    """Writes records as JSON lines; the file is replaced atomically."""
+    path = pathlib.Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def read_results(path=RESULTS_PATH):
+    """Records of a results file, in rank order."""
+    with pathlib.Path(path).open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,75 @@
+import asyncio, contextlib
+
+from cache import FileSummaryCache
+from llm import StubClient, summarize_all
+
+ARTICLES = [(f"Story {i}", f"Story {i} happened on Monday. It was news. More details followed.")
+            for i in range(12)]
+
+
+class FailingClient(StubClient):
+    """Stub that fails for one title."""
+
+    async def generate(self, prompt):
+        if "TITLE: Story 3\n" in prompt:
+            self.calls += 1
+            raise RuntimeError("model error")
+        return await super().generate(prompt)
+
+
+def summarize(articles, client, cache, **kwargs):
+    return asyncio.run(summarize_all(articles, client, cache, **kwargs))
+
+
+def test_summaries_come_back_in_order(tmp_path):
+    summaries = summarize(ARTICLES, StubClient(), FileSummaryCache(tmp_path / "cache.jsonl"))
+    assert summaries == [f"Story {i} happened on Monday. It was news." for i in range(12)]
+
+
+def test_concurrency_limit_is_respected(tmp_path):
+    in_flight, peak = 0, 0
+
+    @contextlib.contextmanager
+    def on_call():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            yield
+        finally:
+            in_flight -= 1
+
+    client = StubClient(delay_s=0.01)
+    summarize(ARTICLES, client, FileSummaryCache(tmp_path / "cache.jsonl"), concurrency=3, on_call=on_call)
+    assert client.calls == 12
+    assert peak == 3
+
+
+def test_cache_hits_skip_the_model(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    first = summarize(ARTICLES, StubClient(), FileSummaryCache(path))
+    client = StubClient()
+    # A fresh cache object reads the entries the first run appended
+    assert summarize(ARTICLES, client, FileSummaryCache(path)) == first
+    assert client.calls == 0
+
+
+def test_duplicate_articles_are_summarized_once(tmp_path):
+    client = StubClient()
+    title, text = ARTICLES[0]
+    # Same text up to whitespace, under another title: one call, one cache key
+    summaries = summarize([(title, text), ("Copy", "  " + text.replace(" ", "  "))], client,
+                          FileSummaryCache(tmp_path / "cache.jsonl"))
+    assert client.calls == 1
+    assert summaries[0] == summaries[1] is not None
+
+
+def test_one_failure_does_not_abort_the_batch(tmp_path):
+    cache = FileSummaryCache(tmp_path / "cache.jsonl")
+    summaries = summarize(ARTICLES, FailingClient(), cache)
+    assert summaries[3] is None
+    assert all(s for i, s in enumerate(summaries) if i != 3)
+    # The failure is not cached: the next run retries only that article
+    client = StubClient()
+    assert summarize(ARTICLES, client, cache)[3] == "Story 3 happened on Monday. It was news."
+    assert client.calls == 1
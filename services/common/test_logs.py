@@ -0,0 +1,74 @@
+import io, json, logging
+
+import pytest
+
+import logs
+from logs import JsonFormatter, Progress, sampled
+
+
+@pytest.fixture
+def log(caplog):
+    caplog.set_level(logging.DEBUG, logger="test_logs")
+    return logging.getLogger("test_logs")
+
+
+def test_sampled_logs_the_first_n_then_every_nth(log, caplog):
+    for i in range(1, 31):
+        sampled(log, logging.WARNING, "test-sampled", "failed %d", i, every=5)
+    assert [r.getMessage() for r in caplog.records][:5] == [
+        f"failed {i} [test-sampled #{i}]" for i in range(1, 6)]
+    assert [r.args[-1] for r in caplog.records] == [1, 2, 3, 4, 5, 10, 15, 20, 25, 30]
+
+
+def test_sampled_skips_disabled_levels(log, caplog):
+    log.setLevel(logging.WARNING)
+    try:
+        sampled(log, logging.DEBUG, "test-disabled", "noise")
+    finally:
+        log.setLevel(logging.NOTSET)
+    assert not caplog.records
+
+
+def test_progress_logs_at_most_every_interval(log, caplog, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(logs.time, "monotonic", lambda: now[0])
+    progress = Progress(log, "rows", total=10, interval=5)
+    for _ in range(10):
+        now[0] += 1
+        progress.update()
+    progress.done()
+    assert [r.getMessage() for r in caplog.records] == [
+        "progress: rows 5/10 in 5.0 s (1/s)",
+        "progress: rows 10/10 in 10.0 s (1/s)",
+        "done: rows 10/10 in 10.0 s (1/s)",
+    ]
+    assert caplog.records[-1].fields == {"what": "rows", "count": 10, "rate": 1.0}
+
+
+def test_json_format_is_one_object_per_line(monkeypatch):
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", list(root.handlers))
+    monkeypatch.setattr(logs, "_configured", logs._configured)
+    level = root.level
+    stream = io.StringIO()
+    try:
+        logs.setup(level="INFO", fmt="json", stream=stream)
+        log = logs.get_logger("test_json")
+        log.debug("hidden")
+        log.info("loaded %d rows", 3, extra={"fields": {"count": 3}})
+    finally:
+        root.setLevel(level)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    out = json.loads(lines[0])
+    assert (out["level"], out["logger"], out["msg"], out["count"]) == ("INFO", "test_json", "loaded 3 rows", 3)
+
+
+def test_json_format_includes_the_exception():
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        record = logging.getLogger("test_json").makeRecord(
+            "test_json", logging.ERROR, __file__, 1, "insert failed", (), logs.sys.exc_info())
+    out = json.loads(JsonFormatter().format(record))
+    assert out["msg"] == "insert failed" and "ValueError: bad row" in out["exc"]
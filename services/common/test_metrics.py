@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+import metrics as metrics_module
+from metrics import BUCKETS, Metrics, percentile
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([1.0], 95) == 1.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([0.0, 10.0], 95) == pytest.approx(9.5)
+
+
+def test_stage_stats_and_cumulative_buckets():
+    m = Metrics("test")
+    for seconds in (0.002, 0.002, 0.3, 100):
+        m.observe("embed", seconds, items=5)
+    s = m.snapshot()[0]["embed"]
+    assert (s["calls"], s["items"]) == (4, 20)
+    assert s["items_per_s"] == pytest.approx(20 / 100.304)
+    assert len(s["buckets"]) == len(BUCKETS) + 1
+    assert s["buckets"][BUCKETS.index(0.005)] == 2
+    assert s["buckets"][BUCKETS.index(0.5)] == 3
+    assert s["buckets"][-1] == 4                # +Inf counts every call
+
+
+def test_time_records_items_set_in_the_block():
+    m = Metrics("test")
+    with m.time("query") as record:
+        record.items = 7
+    with pytest.raises(RuntimeError):
+        with m.time("query"):
+            raise RuntimeError("failed calls are timed too")
+    m.count("errors")
+    m.count("errors", 2)
+    stages, counters = m.snapshot()
+    assert (stages["query"]["calls"], stages["query"]["items"]) == (2, 8)
+    assert counters == {"errors": 3}
+
+
+def test_outputs_cover_every_stage_and_counter():
+    m = Metrics("loader")
+    m.observe("insert", 0.02, items=10)
+    m.count("load_errors")
+    rows = [json.loads(line) for line in m.json_lines().splitlines()]
+    assert [(r["service"], r.get("stage"), r.get("counter")) for r in rows] == [
+        ("loader", "insert", None), ("loader", None, "load_errors")]
+    assert rows[0]["ts"] == rows[1]["ts"] and rows[1]["value"] == 1
+    prom = m.prometheus()
+    assert 'newsjuice_stage_seconds_bucket{service="loader",stage="insert",le="0.025"} 1' in prom
+    assert 'newsjuice_stage_items_total{service="loader",stage="insert"} 10' in prom
+    assert 'newsjuice_events_total{service="loader",name="load_errors"} 1' in prom
+    assert "insert" in m.summary() and "load_errors" in m.summary()
+
+
+def test_finish_appends_once_and_main_shows_the_latest_run(tmp_path, monkeypatch, capsys):
+    out = tmp_path / "metrics.jsonl"
+    monkeypatch.setattr(metrics_module, "METRICS_FORMAT", "json")
+    monkeypatch.setattr(metrics_module, "METRICS_OUT", str(out))
+    for calls in (1, 3):
+        m = Metrics("scraper")
+        for _ in range(calls):
+            m.observe("fetch", 0.1)
+        monkeypatch.setattr(metrics_module, "datetime", FixedClock(calls))
+        m.finish()
+        m.finish()
+    assert len(out.read_text().splitlines()) == 2
+    capsys.readouterr()
+    monkeypatch.setattr(metrics_module.sys, "argv", ["metrics.py", str(out)])
+    metrics_module.main()
+    (row,) = capsys.readouterr().out.splitlines()[1:]
+    assert row.split()[:3] == ["scraper", "fetch", "3"]
+
+
+class FixedClock:
+    """Stands in for datetime so each run gets its own timestamp."""
+
+    def __init__(self, second):
+        self.second = second
+
+    def now(self, tz):
+        from datetime import datetime
+        return datetime(2025, 1, 1, 0, 0, self.second, tzinfo=tz)
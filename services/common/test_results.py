@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from results import read_results, to_record, to_records, write_results
+
+ROWS = [
+    (17, "a1", 0, "Budget vote", "The council approved the budget.",
+     datetime(2025, 9, 30, 12, tzinfo=timezone.utc), "https://example.org/a1", np.float32(0.25)),
+    (18, "a2", np.int64(3), "Frogs", "A new species, «Rana» — found.", None, "https://example.org/a2", 0.5),
+]
+
+
+def test_to_record_is_json_ready():
+    record = to_record(ROWS[0], 1)
+    assert record == {
+        "rank": 1, "article_id": "a1", "chunk_index": 0, "score": 0.25,
+        "text": "The council approved the budget.",
+        "metadata": {"id": 17, "title": "Budget vote", "published_at": "2025-09-30T12:00:00+00:00",
+                     "source_link": "https://example.org/a1"},
+    }
+    assert type(record["score"]) is float and type(to_record(ROWS[1], 2)["chunk_index"]) is int
+
+
+def test_to_record_keeps_missing_values():
+    record = to_record((1, 7, None, None, None, None, None, None), 3)
+    assert record["article_id"] == "7" and record["text"] == ""
+    assert record["chunk_index"] is None and record["score"] is None
+    assert record["metadata"]["published_at"] is None
+
+
+def test_written_records_read_back_unchanged(tmp_path):
+    path = tmp_path / "top-2.jsonl"
+    records = to_records(ROWS)
+    write_results(records, path)
+    assert read_results(path) == records
+    assert [r["rank"] for r in records] == [1, 2]
+    assert not path.with_suffix(".jsonl.tmp").exists()
+
+
+def test_write_results_replaces_the_file(tmp_path):
+    path = tmp_path / "top-2.jsonl"
+    write_results(to_records(ROWS), path)
+    write_results(to_records(ROWS[1:]), path)
+    assert [r["article_id"] for r in read_results(path)] == ["a2"]
@@ -0,0 +1,62 @@
+import pytest
+
+from tokens import count_tokens, fit_chunks, input_budget, pack_batches, split_to_fit, truncate
+
+
+def test_count_tokens_is_pessimistic_per_piece():
+    assert count_tokens("") == 0
+    assert count_tokens("word") == 1
+    assert count_tokens("words") == 2          # 4 ASCII letters per token
+    assert count_tokens("2025") == 4           # one per digit
+    assert count_tokens("a, b.") == 4          # one per punctuation mark
+    assert count_tokens("café") == 2           # "caf" + non-ASCII "é"
+
+
+def test_split_to_fit_keeps_short_text_whole():
+    assert split_to_fit("One sentence.", max_tokens=100) == ["One sentence."]
+
+
+def test_split_to_fit_splits_at_sentences_then_words():
+    text = " ".join(f"Sentence number {i} has a few words in it." for i in range(40))
+    pieces = split_to_fit(text, max_tokens=50)
+    assert len(pieces) > 1
+    assert all(count_tokens(p) <= input_budget(50) for p in pieces)
+    assert " ".join(pieces).split() == text.split()
+    assert all(p.endswith(".") for p in pieces)
+
+
+def test_split_to_fit_cuts_an_overlong_word():
+    pieces = split_to_fit("x" * 1000, max_tokens=20)
+    assert all(count_tokens(p) <= input_budget(20) for p in pieces)
+    assert "".join(pieces).replace(" ", "") == "x" * 1000  # packed pieces are space-joined
+
+
+def test_fit_chunks_only_resplits_oversize_chunks():
+    long = " ".join(["Short sentence here."] * 50)
+    out = fit_chunks(["small one", long], max_tokens=40)
+    assert out[0] == "small one"
+    assert len(out) > 2
+
+
+def test_truncate_cuts_at_a_boundary_within_budget():
+    text = " ".join(f"Sentence number {i} has a few words in it." for i in range(40))
+    assert truncate("Short.", 10) == "Short."
+    cut = truncate(text, 50)
+    assert 0 < count_tokens(cut) <= 50
+    assert text.startswith(cut) and cut.endswith(".")
+    assert truncate(text, 0) == truncate(text, 1) == ""
+
+
+def test_pack_batches_respects_token_and_text_limits():
+    texts = [f"text {i} " + "word " * 20 for i in range(30)]
+    per_text = count_tokens(texts[0])
+    batches = pack_batches(texts, max_tokens=per_text * 10, max_texts=4, max_input_tokens=1000)
+    assert [t for b in batches for t in b] == texts
+    assert all(len(b) <= 4 for b in batches)
+    batches = pack_batches(texts, max_tokens=per_text * 5, max_texts=100, max_input_tokens=1000)
+    assert all(sum(count_tokens(t) for t in b) <= per_text * 5 * 0.9 for b in batches)
+
+
+def test_pack_batches_rejects_overlong_text():
+    with pytest.raises(ValueError):
+        pack_batches(["word " * 100], max_input_tokens=50)
@@ -0,0 +1,116 @@
+'''
+Token budgeting for embedding requests and prompts
+
+Used by the loader (embedding requests) and the summarizer (context
+packing and prompt budgets, which only use count_tokens / split_to_fit /
+truncate).
+
+text-embedding-004 limits (Vertex AI):
+* 2,048 tokens per input text (longer inputs are silently truncated unless
+  auto_truncate=False, which makes them an error instead)
+* 20,000 tokens and 250 texts per embed_content request
+
+count_tokens() is a local, deliberately pessimistic approximation of the
+SentencePiece tokenizer (no API round trip): ASCII words cost one token per
+4 characters, digits and non-ASCII characters one token each, punctuation one
+token each. fit_chunks() splits any chunk over the per-text limit at sentence,
+then word boundaries; pack_batches() groups texts into requests that stay
+under the per-request token and text limits. Limits are applied with a
+safety margin (TOKEN_SAFETY).
+'''
+
+import os
+import re
+
+MAX_INPUT_TOKENS = int(os.environ.get("EMBED_MAX_INPUT_TOKENS", "2048"))
+MAX_REQUEST_TOKENS = int(os.environ.get("EMBED_MAX_REQUEST_TOKENS", "20000"))
+MAX_REQUEST_TEXTS = int(os.environ.get("EMBED_BATCH_SIZE", "250"))
+TOKEN_SAFETY = 0.9   # fraction of each limit actually used
+
+TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d|[^\sA-Za-z\d]")
+SENTENCE_SPLIT = re.compile(r"(?<=[.?!])\s+")
+
+
+def count_tokens(text):
+    n = 0
+    for m in TOKEN_PIECES.finditer(text):
+        piece = m.group()
+        n += -(-len(piece) // 4) if piece.isascii() and piece.isalpha() else 1
+    return n
+
+
+def input_budget(max_tokens=MAX_INPUT_TOKENS):
+    return int(max_tokens * TOKEN_SAFETY)
+
+
+def _pack(pieces, budget, sep):
+    """Greedily joins consecutive pieces while the joined text fits budget."""
+    out, current, used = [], "", 0
+    for piece in pieces:
+        n = count_tokens(piece)
+        if current and used + n > budget:
+            out.append(current)
+            current, used = "", 0
+        current = current + sep + piece if current else piece
+        used += n
+    if current:
+        out.append(current)
+    return out
+
+
+def split_to_fit(text, max_tokens=MAX_INPUT_TOKENS):
+    """Splits one text into pieces that each fit max_tokens (with margin)."""
+    budget = input_budget(max_tokens)
+    if count_tokens(text) <= budget:
+        return [text]
+    pieces = []
+    for sentence in SENTENCE_SPLIT.split(text):
+        if count_tokens(sentence) <= budget:
+            pieces.append(sentence)
+            continue
+        # A single over-long sentence: fall back to words, then characters
+        for word in sentence.split():
+            while count_tokens(word) > budget:
+                pieces.append(word[:budget])
+                word = word[budget:]
+            pieces.append(word)
+    return _pack(pieces, budget, " ")
+
+
+def truncate(text, max_tokens):
+    """text cut at a sentence/word boundary to at most max_tokens ("" if nothing fits)."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    # split_to_fit keeps a safety margin, so ask for the budget before the margin
+    limit = int(max_tokens / TOKEN_SAFETY)
+    if input_budget(limit) < 1:
+        return ""
+    piece = split_to_fit(text, limit)[0]
+    return piece if count_tokens(piece) <= max_tokens else ""
+
+
+def fit_chunks(chunks, max_tokens=MAX_INPUT_TOKENS):
+    """Re-splits any chunk over the per-text limit; others pass unchanged."""
+    return [piece for c in chunks for piece in split_to_fit(c, max_tokens)]
+
+
+def pack_batches(texts, max_tokens=MAX_REQUEST_TOKENS, max_texts=MAX_REQUEST_TEXTS,
+                 max_input_tokens=MAX_INPUT_TOKENS):
+    """Groups texts, in order, into request-sized batches.
+
+    Raises ValueError for a text over the per-text limit (run fit_chunks first).
+    """
+    budget, input_limit = int(max_tokens * TOKEN_SAFETY), input_budget(max_input_tokens)
+    batches, batch, used = [], [], 0
+    for text in texts:
+        n = count_tokens(text)
+        if n > input_limit:
+            raise ValueError(f"text of ~{n} tokens exceeds the {max_input_tokens}-token input limit")
+        if batch and (used + n > budget or len(batch) >= max_texts):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(text)
+        used += n
+    if batch:
+        batches.append(batch)
+    return batches
@@ -1,4 +1,4 @@
-# services/processor/wait_for_db.py
+# services/common/wait_for_db.py
 import os, time, sys, psycopg
 
 url = os.environ["DATABASE_URL"]  # e.g. postgresql://...@dbproxy:5432/newsdb
@@ -0,0 +1,104 @@
+'''
+Benchmark: embedding dimensionality (Matryoshka) vs retrieval quality and speed
+
+text-embedding-004 is Matryoshka-trained, so a 512- or 256-dim embedding is
+the renormalized prefix of the 768-dim one. This harness embeds a fixed
+labeled query set once at full size, then for each dimension:
+
+* recall@k: fraction of queries whose labeled article is among the top-k
+  articles (article score = best chunk cosine similarity)
+* query latency: exact kNN over the corpus tiled to --latency-rows rows
+
+Corpus: the loader's chunk files (default /data/chunked_articles, falling
+back to the sample ./chunked_articles). Labels: bench_queries.jsonl
+({"query": ..., "title": <relevant article title>}).
+
+Usage (loader container, Vertex credentials set):
+  python bench_dims.py --dims 768 512 256 -k 1 3
+  python bench_dims.py --api      # embed queries per dim with output_dimensionality
+'''
+
+import argparse, json, pathlib, time
+
+import numpy as np
+
+from loader import VertexEmbeddings, PATH_TO_CHUNKS
+
+PATH_TO_QUERIES = pathlib.Path(__file__).with_name("bench_queries.jsonl")
+SAMPLE_CHUNKS = pathlib.Path(__file__).with_name("chunked_articles")
+
+
+def truncate(m, dim):
+    """Matryoshka prefix of each row, L2-renormalized."""
+    m = np.asarray(m, dtype=np.float32)[..., :dim]
+    return m / np.maximum(np.linalg.norm(m, axis=-1, keepdims=True), 1e-12)
+
+
+def read_corpus(path):
+    titles, vectors = [], []
+    for fp in sorted(pathlib.Path(path).glob("*.jsonl")):
+        with fp.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    obj = json.loads(line)
+                    titles.append(obj.get("title", ""))
+                    vectors.append(obj["embedding"])
+    return np.array(titles, dtype=object), np.asarray(vectors, dtype=np.float32)
+
+
+def recall_at(sims, titles, labels, k):
+    hits = 0
+    for row, label in zip(sims, labels):
+        ranked = []
+        for i in np.argsort(-row):
+            if titles[i] not in ranked:
+                ranked.append(titles[i])
+            if len(ranked) == k:
+                break
+        hits += label in ranked
+    return hits / len(labels)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dims", type=int, nargs="+", default=[768, 512, 256])
+    ap.add_argument("-k", type=int, nargs="+", default=[1, 3])
+    ap.add_argument("--chunks", default=None)
+    ap.add_argument("--queries", default=str(PATH_TO_QUERIES))
+    ap.add_argument("--latency-rows", type=int, default=100_000)
+    ap.add_argument("--api", action="store_true",
+                    help="embed queries per dimension via output_dimensionality instead of truncating")
+    args = ap.parse_args()
+
+    chunks = args.chunks or (PATH_TO_CHUNKS if any(PATH_TO_CHUNKS.glob("*.jsonl")) else SAMPLE_CHUNKS)
+    titles, corpus = read_corpus(chunks)
+    with open(args.queries, "r", encoding="utf-8") as f:
+        labeled = [json.loads(line) for line in f if line.strip()]
+    texts = [q["query"] for q in labeled]
+    labels = [q["title"] for q in labeled]
+    print(f"[bench] corpus {len(corpus)} chunks / {len(set(titles))} articles from {chunks}; "
+          f"{len(labeled)} labeled queries")
+
+    full = np.asarray(VertexEmbeddings(dim=max(args.dims)).embed_documents(texts), dtype=np.float32)
+
+    rng = np.random.default_rng(0)
+    tiled = corpus[rng.integers(0, len(corpus), args.latency_rows)]
+
+    header = " ".join(f"{'recall@' + str(k):>9}" for k in args.k)
+    print(f"{'dim':>5} {header} {'ms/query':>9} {'MB/1M rows':>11}")
+    for dim in args.dims:
+        queries = (truncate(VertexEmbeddings(dim=dim).embed_documents(texts), dim)
+                   if args.api else truncate(full, dim))
+        sims = queries @ truncate(corpus, dim).T
+        recalls = " ".join(f"{recall_at(sims, titles, labels, k):>9.3f}" for k in args.k)
+
+        matrix = truncate(tiled, dim)
+        t0 = time.perf_counter()
+        for q in queries:
+            np.argpartition(-(matrix @ q), 10)[:10]
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        print(f"{dim:>5} {recalls} {ms:>9.3f} {dim * 4 * 1e6 / 2**20:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+'''
+Benchmark: per-row print() vs level-gated logging with progress lines
+
+Replays the per-row work of load() without a database: parse a chunk line
+(JSON with a full-size embedding), add it to the article's running centroid,
+then report the row the way each mode does:
+
+  print     one stdout line per row (the old "Inserting row number ..." print)
+  logging   log.debug per row (filtered at INFO) + a Progress line every
+            LOG_PROGRESS_S seconds (what load() does now)
+  debug     the same, with LOG_LEVEL=DEBUG (every row logged)
+  none      no per-row output (lower bound)
+
+Each mode runs in a fresh subprocess whose stdout goes to a file or a pipe
+(as under `docker compose run` / `make run > output.log`), and reports
+rows/s.
+
+Usage:
+  python bench_logging.py -n 100000 --sink file pipe
+'''
+
+import argparse, json, os, subprocess, sys, tempfile, time
+
+import numpy as np
+
+MODES = ("print", "logging", "debug", "none")
+
+
+def make_rows(n, dim):
+    rng = np.random.default_rng(0)
+    base = {"article_id": "a" * 32, "chunk": "lorem ipsum " * 30, "title": "t",
+            "embedding": [round(float(x), 6) for x in rng.standard_normal(dim)]}
+    line = json.dumps(base)
+    return [line] * n
+
+
+def worker(mode, n, dim):
+    if mode == "debug":
+        os.environ["LOG_LEVEL"] = "DEBUG"
+    from logs import get_logger, Progress
+    log = get_logger("bench")
+    rows = make_rows(n, dim)
+    centroid = np.zeros(dim, dtype=np.float32)
+    progress = Progress(log, "rows inserted")
+
+    t0 = time.perf_counter()
+    for i, line in enumerate(rows):
+        obj = json.loads(line)
+        centroid += np.asarray(obj["embedding"], dtype=np.float32)
+        if mode == "print":
+            print(f"Inserting row number into vector DB: {i}")
+        elif mode in ("logging", "debug"):
+            log.debug("inserted row %d", i)
+            progress.update()
+    elapsed = time.perf_counter() - t0
+    if mode in ("logging", "debug"):
+        progress.done()
+    sys.stdout.flush()
+    sys.stderr.write(json.dumps({"mode": mode, "rows_per_s": n / elapsed, "seconds": elapsed}) + "\n")
+
+
+def run(mode, sink, n, dim):
+    cmd = [sys.executable, __file__, "--worker", mode, "-n", str(n), "--dim", str(dim)]
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    if sink == "file":
+        with tempfile.TemporaryFile() as out:
+            proc = subprocess.run(cmd, stdout=out, stderr=subprocess.PIPE, text=True, cwd=cwd)
+            out.seek(0, os.SEEK_END)
+            size = out.tell()
+    else:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=cwd)
+        size = len(proc.stdout.encode())
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+    result = json.loads(proc.stderr.strip().splitlines()[-1])
+    result["stdout_mb"] = size / 2**20
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=100_000, help="rows")
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    ap.add_argument("--sink", nargs="+", default=["file", "pipe"], choices=["file", "pipe"])
+    ap.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.n, args.dim)
+        return
+
+    print(f"[bench] {args.n} rows, {args.dim}-dim embeddings")
+    print(f"{'sink':<5} {'mode':<8} {'rows/s':>9} {'seconds':>8} {'stdout MB':>10} {'vs print':>9}")
+    for sink in args.sink:
+        results = {mode: run(mode, sink, args.n, args.dim) for mode in args.modes}
+        base = results.get("print")
+        for mode, r in results.items():
+            speedup = f"{r['rows_per_s'] / base['rows_per_s']:.2f}x" if base else "-"
+            print(f"{sink:<5} {mode:<8} {r['rows_per_s']:>9.0f} {r['seconds']:>8.2f} "
+                  f"{r['stdout_mb']:>10.2f} {speedup:>9}")
+
+
+if __name__ == "__main__":
+    main()
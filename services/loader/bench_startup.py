@@ -0,0 +1,64 @@
+'''
+Startup benchmark based on `python -X importtime`
+
+Imports each module in a fresh interpreter with -X importtime, and reports
+the wall time of the import plus the slowest imported packages (cumulative
+microseconds as printed by CPython). Use it to check that health checks and
+non-embedding steps (schema.py, `loader.py load`) stay well under a second.
+
+Usage (loader container):
+  python bench_startup.py                      # loader, schema, psycopg
+  python bench_startup.py loader --top 15
+  python bench_startup.py loader --budget 1.0  # non-zero exit if slower
+'''
+
+import argparse, os, subprocess, sys, time
+
+
+def import_profile(module):
+    """Returns (wall seconds, [(cumulative_us, package), ...]) for one import."""
+    cmd = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise SystemExit(f"[startup] import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative, name = line.replace("import time:", "|", 1).split("|")
+        # Keep the indent of nested imports: only top-level entries add up to the total
+        rows.append((int(cumulative), name[1:].rstrip()))
+    return wall, rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("modules", nargs="*", default=["loader", "schema", "psycopg"])
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--budget", type=float, default=None, help="max seconds per module")
+    args = ap.parse_args()
+
+    slow = []
+    for module in args.modules:
+        wall, rows = import_profile(module)
+        top_level = [r for r in rows if not r[1].startswith(" ")]
+        total_ms = sum(us for us, _ in top_level) / 1000
+        print(f"[startup] import {module}: {wall:.3f} s wall (interpreter incl.), {total_ms:.1f} ms in imports")
+        for us, name in sorted(rows, reverse=True)[:args.top]:
+            print(f"    {us / 1000:8.1f} ms  {name.strip()}")
+        if args.budget is not None and wall > args.budget:
+            slow.append(module)
+
+    if slow:
+        print(f"[startup] over {args.budget} s budget: {', '.join(slow)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
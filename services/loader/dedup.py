@@ -0,0 +1,159 @@
+'''
+Near-duplicate detection for scraped articles (MinHash + LSH)
+
+Feeds syndicate the same story under different URLs. Before chunking, each
+article's word 5-gram shingles are MinHashed (NUM_PERM hash functions) and
+looked up in an LSH index (BANDS bands of ROWS rows). Candidates that share a
+band are confirmed by the estimated Jaccard similarity (>= DEDUP_THRESHOLD);
+confirmed duplicates are skipped, so only the first copy of a story is
+chunked and embedded.
+
+The index is saved to DEDUP_INDEX after each run, so a story loaded by an
+earlier run is also recognised when it shows up again under a new URL.
+
+Usage:
+  python dedup.py /data/news.jsonl            # report duplicates, change nothing
+  python dedup.py /data/news.jsonl -o out.jsonl
+'''
+
+import argparse, hashlib, json, os, pathlib, re, sys
+
+import numpy as np
+
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.8"))
+DEDUP_INDEX = pathlib.Path(os.environ.get("DEDUP_INDEX", "/data/dedup_index.npz"))
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS, ROWS = 16, 8   # BANDS * ROWS == NUM_PERM; candidate threshold ~(1/16)**(1/8) = 0.71
+
+PRIME = (1 << 31) - 1
+WORDS = re.compile(r"\w+")
+
+_rng = np.random.default_rng(1)
+PERM_A = _rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    words = WORDS.findall(text.lower())
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash(text):
+    """NUM_PERM-value MinHash signature of the text's shingles (uint64)."""
+    sh = shingles(text)
+    if not sh:
+        return np.full(NUM_PERM, PRIME, dtype=np.uint64)
+    h = np.array([int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") % PRIME
+                  for s in sh], dtype=np.uint64)
+    # (a * h + b) mod p for every permutation x shingle; a, h < 2**31 so no overflow
+    return ((np.outer(PERM_A, h) + PERM_B[:, None]) % PRIME).min(axis=1)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+
+def article_text(obj):
+    return f"{obj.get('title', '')}\n{obj.get('content', '')}"
+
+
+def article_key(obj):
+    """The article's own URL (entry link), else its title.
+
+    Not source_link: that is the feed URL, the same for every article of a feed.
+    """
+    return obj.get("link") or obj.get("title", "")
+
+
+class MinHashLSH:
+    """Banded LSH over MinHash signatures; keys are article identifiers."""
+
+    def __init__(self, threshold=DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.keys = []
+        self.signatures = []
+        self.buckets = [dict() for _ in range(BANDS)]
+
+    def _bands(self, sig):
+        return [sig[b * ROWS:(b + 1) * ROWS].tobytes() for b in range(BANDS)]
+
+    def add(self, key, sig):
+        pos = len(self.keys)
+        self.keys.append(key)
+        self.signatures.append(sig)
+        for bucket, band in zip(self.buckets, self._bands(sig)):
+            bucket.setdefault(band, []).append(pos)
+
+    def query(self, sig):
+        """(key, similarity) of the most similar indexed article above threshold, or None."""
+        candidates = {pos for bucket, band in zip(self.buckets, self._bands(sig))
+                      for pos in bucket.get(band, ())}
+        best = None
+        for pos in candidates:
+            s = similarity(sig, self.signatures[pos])
+            if s >= self.threshold and (best is None or s > best[1]):
+                best = (self.keys[pos], s)
+        return best
+
+    def check(self, key, text):
+        """Returns the duplicate match for text, or indexes it and returns None."""
+        sig = minhash(text)
+        match = self.query(sig)
+        if match is None:
+            self.add(key, sig)
+        return match
+
+    def __len__(self):
+        return len(self.keys)
+
+    def save(self, path=DEDUP_INDEX):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sigs = np.array(self.signatures, dtype=np.uint64).reshape(-1, NUM_PERM)
+        with path.open("wb") as f:  # file object: np.savez would append .npz to the name
+            np.savez(f, keys=np.array(self.keys, dtype=str), signatures=sigs)
+
+    @classmethod
+    def open(cls, path=DEDUP_INDEX, threshold=DEDUP_THRESHOLD):
+        index = cls(threshold)
+        path = pathlib.Path(path)
+        if path.exists():
+            data = np.load(path)
+            for key, sig in zip(data["keys"], data["signatures"]):
+                index.add(str(key), sig)
+        return index
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("news", type=pathlib.Path)
+    ap.add_argument("-o", "--output", type=pathlib.Path, help="write the unique articles here")
+    ap.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    args = ap.parse_args()
+
+    index = MinHashLSH(args.threshold)
+    kept, dropped = [], 0
+    with args.news.open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            key = article_key(obj)
+            match = index.check(key, article_text(obj))
+            if match:
+                dropped += 1
+                print(f"[dedup] {key} ~ {match[0]} ({match[1]:.2f})")
+            else:
+                kept.append(line)
+
+    print(f"[dedup] {len(kept)} unique, {dropped} duplicates", file=sys.stderr)
+    if args.output:
+        args.output.write_text("".join(kept), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+'''
+chunks_vector schema
+
+chunks_vector is range-partitioned by PUBLISHED_KEY, published_at with
+undated rows mapped to -infinity:
+
+* one partition per month around now (ensure_partitions())
+* chunks_vector_undated for rows without published_at
+* a DEFAULT partition for dated rows outside the monthly ones (very old,
+  or months ahead that were not created yet)
+
+Queries that bound PUBLISHED_KEY on both sides within the monthly partitions
+(e.g. "news from the last 48 hours": since = now - 48h, until = now) are
+pruned to the matching months, DEFAULT and undated included, and each
+partition carries its own HNSW index, so the kNN search only walks the
+recent graphs instead of post-filtering a global one. The filters have to
+use PUBLISHED_KEY itself, not published_at, for the planner to prune.
+
+Usage (inside the loader container):
+  python schema.py              # create table if missing + upcoming partitions
+  python schema.py --migrate    # one-off: move an existing table into this layout
+  python schema.py --backfill   # one-off: fill articles_vector from chunks_vector
+                                #          and tag unregistered rows with LEGACY_MODEL
+
+  VECTOR_INDEX_MODE=halfvec python schema.py   # add the halfvec (or binary) index
+'''
+
+import os, sys
+from datetime import datetime, timezone
+
+import psycopg
+
+from logs import get_logger
+
+log = get_logger("schema")
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))  # same as the loader's
+
+TABLE = "chunks_vector"
+LEGACY_TABLE = "chunks_vector_unpartitioned"
+LEGACY_PARTITIONED_TABLE = "chunks_vector_by_published_at"  # before the undated partition
+
+# Partition key; NULL (undated) cannot go to a range partition, -infinity can
+PUBLISHED_KEY = "coalesce(published_at, '-infinity'::timestamptz)"
+UNDATED_BEFORE = "0001-01-01 00:00:00+00"  # upper bound of the undated partition
+
+# Partitions kept ready around "now" (older rows go to DEFAULT)
+PARTITION_MONTHS_BACK = int(os.getenv("PARTITION_MONTHS_BACK", "3"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "1"))
+
+COLUMNS = ("id, author, title, summary, content, source_link, source_type, "
+           "fetched_at, published_at, chunk, chunk_index, embedding, article_id, "
+           "embedding_model, embedding_dim")
+
+CREATE_TABLE = f"""
+CREATE SEQUENCE IF NOT EXISTS chunks_vector_ids;
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    id           bigint NOT NULL DEFAULT nextval('chunks_vector_ids'),
+    author       text,
+    title        text,
+    summary      text,
+    content      text,
+    source_link  text,
+    source_type  text,
+    fetched_at   timestamptz,
+    published_at timestamptz,
+    chunk        text,
+    chunk_index  integer,
+    embedding    vector({EMBEDDING_DIM}),
+    article_id   text
+) PARTITION BY RANGE (({PUBLISHED_KEY}));
+CREATE TABLE IF NOT EXISTS {TABLE}_undated PARTITION OF {TABLE}
+    FOR VALUES FROM (MINVALUE) TO ('{UNDATED_BEFORE}');
+CREATE TABLE IF NOT EXISTS {TABLE}_default PARTITION OF {TABLE} DEFAULT;
+ALTER TABLE {TABLE}
+    ADD COLUMN IF NOT EXISTS embedding_model text,
+    ADD COLUMN IF NOT EXISTS embedding_dim   integer;
+CREATE INDEX IF NOT EXISTS {TABLE}_id_idx
+    ON {TABLE} (id);
+CREATE INDEX IF NOT EXISTS {TABLE}_article_idx
+    ON {TABLE} (article_id);
+CREATE INDEX IF NOT EXISTS {TABLE}_filter_idx
+    ON {TABLE} (source_type, source_link, published_at);
+"""
+
+# HNSW index over chunks_vector.embedding, by storage mode. The quantized ones
+# are expression indexes: the full-precision column stays in the table and is
+# used by the retriever to re-score the candidates (RETRIEVER_QUANT).
+#   float    4 bytes/dim   (current)
+#   halfvec  2 bytes/dim
+#   binary   1 bit/dim     (sign of each dimension, Hamming distance)
+VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "float")
+
+VECTOR_INDEXES = {
+    "float": (f"{TABLE}_embedding_hnsw",
+              "hnsw (embedding vector_cosine_ops)"),
+    "halfvec": (f"{TABLE}_embedding_half_hnsw",
+                f"hnsw ((embedding::halfvec({EMBEDDING_DIM})) halfvec_cosine_ops)"),
+    "binary": (f"{TABLE}_embedding_bit_hnsw",
+               f"hnsw ((binary_quantize(embedding)::bit({EMBEDDING_DIM})) bit_hamming_ops)"),
+}
+
+# One centroid embedding per article (mean of its chunk embeddings), used by
+# the retriever's two-stage mode as a coarse index in front of chunks_vector.
+ARTICLES_TABLE = "articles_vector"
+
+CREATE_ARTICLES_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {ARTICLES_TABLE} (
+    article_id   text PRIMARY KEY,
+    title        text,
+    source_link  text,
+    source_type  text,
+    published_at timestamptz,
+    n_chunks     integer,
+    embedding    vector({EMBEDDING_DIM})
+);
+CREATE INDEX IF NOT EXISTS {ARTICLES_TABLE}_embedding_hnsw
+    ON {ARTICLES_TABLE} USING hnsw (embedding vector_cosine_ops);
+CREATE INDEX IF NOT EXISTS {ARTICLES_TABLE}_published_idx
+    ON {ARTICLES_TABLE} (published_at);
+ALTER TABLE {ARTICLES_TABLE}
+    ADD COLUMN IF NOT EXISTS embedding_model text,
+    ADD COLUMN IF NOT EXISTS embedding_dim   integer;
+"""
+
+UPSERT_ARTICLE = f"""
+INSERT INTO {ARTICLES_TABLE} (article_id, title, source_link, source_type,
+                              published_at, n_chunks, embedding,
+                              embedding_model, embedding_dim)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (article_id) DO UPDATE SET
+    title = EXCLUDED.title,
+    source_link = EXCLUDED.source_link,
+    source_type = EXCLUDED.source_type,
+    published_at = EXCLUDED.published_at,
+    n_chunks = EXCLUDED.n_chunks,
+    embedding = EXCLUDED.embedding,
+    embedding_model = EXCLUDED.embedding_model,
+    embedding_dim = EXCLUDED.embedding_dim;
+"""
+
+# Embedding model registry. Every chunks_vector / articles_vector row records
+# the model and dimension its vector came from, and the loader registers each
+# (model, dim) it writes, so the retriever can pick the matching query encoder
+# and never compares vectors from different embedding spaces.
+REGISTRY_TABLE = "embedding_models"
+
+CREATE_REGISTRY = f"""
+CREATE TABLE IF NOT EXISTS {REGISTRY_TABLE} (
+    model         text NOT NULL,
+    dim           integer NOT NULL,
+    provider      text NOT NULL,
+    registered_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (model, dim)
+);
+"""
+
+REGISTER_MODEL = f"""
+INSERT INTO {REGISTRY_TABLE} (model, dim, provider)
+VALUES (%s, %s, %s)
+ON CONFLICT (model, dim) DO UPDATE SET registered_at = now();
+"""
+
+# Rows written before the registry existed all came from the loader's
+# Vertex text-embedding-004 at 768 dimensions
+LEGACY_MODEL = ("text-embedding-004", 768, "vertex")
+
+BACKFILL_MODELS = [
+    f"""INSERT INTO {REGISTRY_TABLE} (model, dim, provider) VALUES (%s, %s, %s)
+        ON CONFLICT (model, dim) DO NOTHING;""",
+    f"UPDATE {TABLE} SET embedding_model = %s, embedding_dim = %s WHERE embedding_model IS NULL;",
+    f"UPDATE {ARTICLES_TABLE} SET embedding_model = %s, embedding_dim = %s WHERE embedding_model IS NULL;",
+]
+
+# pgvector's avg(vector) gives the same centroid for rows loaded before
+# articles_vector existed
+BACKFILL_ARTICLES = f"""
+INSERT INTO {ARTICLES_TABLE} (article_id, title, source_link, source_type,
+                              published_at, n_chunks, embedding,
+                              embedding_model, embedding_dim)
+SELECT article_id, min(title), min(source_link), min(source_type),
+       min(published_at), count(*), avg(embedding),
+       min(embedding_model), min(embedding_dim)
+FROM {TABLE}
+WHERE article_id IS NOT NULL
+GROUP BY article_id
+ON CONFLICT (article_id) DO NOTHING;
+"""
+
+# Same centroid for the given articles, recomputed from their stored chunks;
+# used when load() resumes inside a chunk file and has no running sum
+REFRESH_ARTICLES = f"""
+INSERT INTO {ARTICLES_TABLE} (article_id, title, source_link, source_type,
+                              published_at, n_chunks, embedding,
+                              embedding_model, embedding_dim)
+SELECT article_id, min(title), min(source_link), min(source_type),
+       min(published_at), count(*), avg(embedding),
+       min(embedding_model), min(embedding_dim)
+FROM {TABLE}
+WHERE article_id = ANY(%s)
+GROUP BY article_id
+ON CONFLICT (article_id) DO UPDATE SET
+    n_chunks = EXCLUDED.n_chunks,
+    embedding = EXCLUDED.embedding;
+"""
+
+# Load checkpoints: one row per chunk file (shard) with the last line whose
+# rows are committed. load() writes it in the same transaction as those rows,
+# so after a crash the journal and the data always agree. size/mtime identify
+# the file version; a rewritten file starts again from line 0.
+CHECKPOINT_TABLE = "load_checkpoints"
+
+CREATE_CHECKPOINTS = f"""
+CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+    shard      text PRIMARY KEY,
+    size       bigint NOT NULL,
+    mtime      double precision NOT NULL,
+    line       integer NOT NULL,
+    done       boolean NOT NULL DEFAULT false,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+"""
+
+SAVE_CHECKPOINT = f"""
+INSERT INTO {CHECKPOINT_TABLE} (shard, size, mtime, line, done)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (shard) DO UPDATE SET
+    size = EXCLUDED.size,
+    mtime = EXCLUDED.mtime,
+    line = EXCLUDED.line,
+    done = EXCLUDED.done,
+    updated_at = now();
+"""
+
+
+def _month_start(d: datetime) -> datetime:
+    return datetime(d.year, d.month, 1, tzinfo=timezone.utc)
+
+
+def _add_months(d: datetime, n: int) -> datetime:
+    m = d.month - 1 + n
+    return datetime(d.year + m // 12, m % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def is_partitioned(cur, table=TABLE) -> bool:
+    cur.execute("SELECT relkind FROM pg_class WHERE relname = %s;", (table,))
+    row = cur.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def has_undated_partition(cur) -> bool:
+    """True when chunks_vector is partitioned by PUBLISHED_KEY (not plain published_at)."""
+    cur.execute("SELECT pg_get_partkeydef(%s::regclass);", (TABLE,))
+    return "coalesce" in (cur.fetchone()[0] or "").lower()
+
+
+def ensure_partitions(cur, now=None,
+                      months_back=PARTITION_MONTHS_BACK,
+                      months_ahead=PARTITION_MONTHS_AHEAD):
+    """Creates the monthly partitions around `now` that do not exist yet."""
+    if not is_partitioned(cur) or not has_undated_partition(cur):
+        log.warning("%s is not in the current partitioned layout; run `python schema.py --migrate`", TABLE)
+        return
+    first = _add_months(_month_start(now or datetime.now(timezone.utc)), -months_back)
+    for n in range(months_back + months_ahead + 1):
+        lo = _add_months(first, n)
+        hi = _add_months(lo, 1)
+        name = f"{TABLE}_y{lo.year}m{lo.month:02d}"
+        try:
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}');"
+            )
+        except Exception as ex:
+            # e.g. DEFAULT already holds rows for that month
+            log.error("could not create partition %s :: %s", name, ex)
+
+
+def create_vector_index(cur, mode=VECTOR_INDEX_MODE):
+    """Creates the HNSW index for the storage mode; returns its name."""
+    name, method = VECTOR_INDEXES[mode]
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {TABLE} USING {method};")
+    return name
+
+
+def register_model(cur, model, dim, provider):
+    cur.execute(REGISTER_MODEL, (model, dim, provider))
+
+
+def ensure_load_schema(cur):
+    """Cheap, idempotent checks run by load() before inserting."""
+    cur.execute(CREATE_ARTICLES_TABLE)
+    cur.execute(CREATE_REGISTRY)
+    cur.execute(CREATE_CHECKPOINTS)
+    cur.execute(f"""
+        ALTER TABLE {TABLE}
+            ADD COLUMN IF NOT EXISTS embedding_model text,
+            ADD COLUMN IF NOT EXISTS embedding_dim   integer;
+    """)
+    # Make sure this month's partition exists so new rows do not land in DEFAULT
+    ensure_partitions(cur)
+
+
+def create(cur):
+    cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+    cur.execute(CREATE_TABLE)
+    create_vector_index(cur)
+    cur.execute(CREATE_ARTICLES_TABLE)
+    cur.execute(CREATE_REGISTRY)
+    cur.execute(CREATE_CHECKPOINTS)
+    ensure_partitions(cur)
+
+
+def load_checkpoint(cur, shard, size, mtime):
+    """(line, done) committed for this version of the shard, else (0, False)."""
+    cur.execute(f"SELECT size, mtime, line, done FROM {CHECKPOINT_TABLE} WHERE shard = %s;",
+                (shard,))
+    row = cur.fetchone()
+    if row is None or row[0] != size or row[1] != mtime:
+        return 0, False
+    return row[2], row[3]
+
+
+def save_checkpoint(cur, shard, size, mtime, line, done=False):
+    cur.execute(SAVE_CHECKPOINT, (shard, size, mtime, line, done))
+
+
+def migrate(conn):
+    """Moves an existing chunks_vector into the current partitioned layout.
+
+    From an unpartitioned table (kept as chunks_vector_unpartitioned) or one
+    partitioned by plain published_at, with undated rows in DEFAULT (kept as
+    chunks_vector_by_published_at, its partitions suffixed _legacy). Drop
+    the old table by hand once the new one has been checked.
+    """
+    with conn.transaction(), conn.cursor() as cur:
+        partitioned = is_partitioned(cur)
+        if partitioned and has_undated_partition(cur):
+            log.info("%s is already partitioned", TABLE)
+            return
+        legacy = LEGACY_PARTITIONED_TABLE if partitioned else LEGACY_TABLE
+        # Free the names the new table, its partitions and indexes use
+        cur.execute("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = %s::regclass;",
+                    (TABLE,))
+        for (child,) in cur.fetchall():
+            cur.execute(f"ALTER TABLE {child} RENAME TO {child}_legacy;")
+        cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s;", (TABLE,))
+        for (index,) in cur.fetchall():
+            cur.execute(f"ALTER INDEX {index} RENAME TO {index}_legacy;")
+        cur.execute(f"ALTER TABLE {TABLE} RENAME TO {legacy};")
+        cur.execute(f"""
+            ALTER TABLE {legacy}
+                ADD COLUMN IF NOT EXISTS embedding_model text,
+                ADD COLUMN IF NOT EXISTS embedding_dim   integer;
+        """)
+        cur.execute(f"SELECT min(published_at) FROM {legacy};")
+        oldest = cur.fetchone()[0]
+        create(cur)
+        if oldest is not None:
+            now = datetime.now(timezone.utc)
+            back = (now.year - oldest.year) * 12 + now.month - oldest.month
+            ensure_partitions(cur, now, months_back=max(back, PARTITION_MONTHS_BACK))
+        cur.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {legacy};")
+        log.info("moved %d rows into partitioned %s", cur.rowcount, TABLE)
+        cur.execute(f"SELECT setval('chunks_vector_ids', coalesce(max(id), 0) + 1, false) FROM {TABLE};")
+
+
+def main():
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+        if "--migrate" in sys.argv:
+            migrate(conn)
+        else:
+            with conn.cursor() as cur:
+                create(cur)
+                if "--backfill" in sys.argv:
+                    model, dim, provider = LEGACY_MODEL
+                    cur.execute(BACKFILL_MODELS[0], (model, dim, provider))
+                    cur.execute(BACKFILL_MODELS[1], (model, dim))
+                    cur.execute(BACKFILL_MODELS[2], (model, dim))
+                    cur.execute(BACKFILL_ARTICLES)
+                    log.info("backfilled %d articles into %s", cur.rowcount, ARTICLES_TABLE)
+
+
+if __name__ == "__main__":
+    main()
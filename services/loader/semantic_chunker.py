@@ -0,0 +1,103 @@
+'''
+Semantic chunker with batched, cached sentence embeddings
+
+Same idea as langchain's SemanticChunker (split where the embedding of
+neighbouring sentences jumps), but:
+
+* every sentence is embedded exactly once, in batched requests
+  (VertexEmbeddings.embed_documents), instead of one HTTP call per sentence
+* the buffered sentence windows and the breakpoint distances are computed
+  with vectorized NumPy on those cached vectors
+* one-sentence chunks reuse their sentence vector; multi-sentence chunks are
+  re-embedded together, in batches (chunk_embedding="exact", the default)
+
+so an article costs one embedding call per token-packed batch of sentences
+(tokens.pack_batches), plus the batches of multi-sentence chunks. Over-long
+sentences are split before embedding and chunks are closed before they
+exceed the per-text token limit, so every chunk can be embedded without
+truncation. chunk_embedding="derived" skips the chunk calls and uses the
+normalized mean of the chunk's sentence vectors instead; its retrieval
+quality has not been measured against exact, so it is opt-in.
+'''
+
+import re
+
+import numpy as np
+
+from tokens import count_tokens, input_budget, split_to_fit, MAX_INPUT_TOKENS
+
+# Sentence split used by langchain's SemanticChunker
+SENTENCE_SPLIT = re.compile(r"(?<=[.?!])\s+")
+
+BREAKPOINT_PERCENTILE = 95   # split at distances above this percentile
+BUFFER_SIZE = 1              # neighbours on each side in a sentence window
+
+
+def split_sentences(text, max_tokens=MAX_INPUT_TOKENS):
+    """Sentences, with any sentence over max_tokens split further."""
+    return [piece for s in SENTENCE_SPLIT.split(text.strip()) if s.strip()
+            for piece in split_to_fit(s, max_tokens)]
+
+
+def _normalize(m):
+    m = np.asarray(m, dtype=np.float32)
+    return m / np.maximum(np.linalg.norm(m, axis=-1, keepdims=True), 1e-12)
+
+
+def window_means(vectors, buffer_size=BUFFER_SIZE):
+    """Normalized mean over [i - buffer_size, i + buffer_size] for every row."""
+    n = len(vectors)
+    csum = np.vstack([np.zeros((1, vectors.shape[1]), dtype=np.float32), np.cumsum(vectors, axis=0)])
+    idx = np.arange(n)
+    lo = np.clip(idx - buffer_size, 0, n)
+    hi = np.clip(idx + buffer_size + 1, 0, n)
+    return _normalize(csum[hi] - csum[lo])
+
+
+def breakpoints(vectors, percentile=BREAKPOINT_PERCENTILE, buffer_size=BUFFER_SIZE):
+    """Indices i where a new chunk starts at sentence i + 1."""
+    if len(vectors) < 2:
+        return np.array([], dtype=np.int64)
+    windows = window_means(vectors, buffer_size)
+    distances = 1.0 - np.sum(windows[:-1] * windows[1:], axis=1)
+    return np.flatnonzero(distances > np.percentile(distances, percentile))
+
+
+def token_spans(starts, sentence_tokens, budget):
+    """Splits [start, end) spans further so no span exceeds budget tokens."""
+    spans = []
+    for a, b in zip(starts[:-1], starts[1:]):
+        start, used = a, 0
+        for i in range(a, b):
+            # +1 per sentence for the joining space
+            if i > start and used + sentence_tokens[i] + 1 > budget:
+                spans.append((start, i))
+                start, used = i, 0
+            used += sentence_tokens[i] + 1
+        spans.append((start, b))
+    return spans
+
+
+def semantic_split(text, emb, percentile=BREAKPOINT_PERCENTILE, buffer_size=BUFFER_SIZE,
+                   chunk_embedding="exact", max_tokens=MAX_INPUT_TOKENS):
+    """Returns (chunks, chunk_embeddings) for one article.
+
+    emb: object with embed_documents(texts) -> list of vectors (batched).
+    """
+    sentences = split_sentences(text, max_tokens)
+    if not sentences:
+        return [], []
+    vectors = _normalize(emb.embed_documents(sentences))
+
+    starts = np.concatenate([[0], breakpoints(vectors, percentile, buffer_size) + 1, [len(sentences)]])
+    spans = token_spans(starts, [count_tokens(s) for s in sentences], input_budget(max_tokens))
+    chunks = [" ".join(sentences[a:b]) for a, b in spans]
+
+    if chunk_embedding == "exact":
+        multi = [i for i, (a, b) in enumerate(spans) if b - a > 1]
+        exact = dict(zip(multi, emb.embed_documents([chunks[i] for i in multi])))
+        chunk_vectors = [list(exact[i]) if i in exact else vectors[a].tolist()
+                         for i, (a, b) in enumerate(spans)]
+    else:
+        chunk_vectors = _normalize([vectors[a:b].mean(axis=0) for a, b in spans]).tolist()
+    return chunks, chunk_vectors
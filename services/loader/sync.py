@@ -0,0 +1,255 @@
+'''
+Artifact sync between /data and the GCS bucket
+
+Pushes (uploads) or pulls (downloads) whole artifact directories: scraped
+news, chunk shards, dedup index, retrieval results.
+
+* one storage.Client per process (get_client), shared by all transfers
+* files are transferred in parallel, SYNC_WORKERS at a time
+* a file is skipped when the other side has the same size and CRC32C (GCS
+  keeps a CRC32C for every object, composite ones included), so a run that
+  was interrupted resumes with the files it had not finished
+* files over SYNC_CHUNK_MB go up as resumable uploads in SYNC_CHUNK_MB
+  pieces; files over SYNC_COMPOSE_MB are cut into parts (<name>.part-NNN)
+  that are uploaded in parallel and composed into one object (at most 32
+  parts). The parts are deleted once composed; parts left by an interrupted
+  push are reused by the next one when their size and CRC32C still match,
+  and deleted when their file no longer needs them
+
+BUCKET_NAME / SYNC_PREFIX ---- destination gs://bucket/prefix/ (default
+                               newsjuice-data-exchange, "artifacts")
+SYNC_PATHS                ---- comma-separated paths under /data (default:
+                               news.jsonl, chunked_articles, dedup_index.npz,
+                               top-2.jsonl; missing ones are skipped)
+STORAGE_EMULATOR_HOST     ---- e.g. http://localhost:4443 to run against a
+                               local GCS emulator (fake-gcs-server), with
+                               anonymous credentials
+
+Usage:
+  python sync.py push [paths...]
+  python sync.py pull [paths...]
+'''
+
+import argparse, base64, os, pathlib, re, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+from logs import get_logger
+
+log = get_logger("sync")
+
+BUCKET_NAME = os.environ.get("BUCKET_NAME", "newsjuice-data-exchange")
+SYNC_PREFIX = os.environ.get("SYNC_PREFIX", "artifacts").strip("/")
+DATA_DIR = pathlib.Path(os.environ.get("SYNC_DATA_DIR", "/data"))
+SYNC_PATHS = [p for p in os.environ.get(
+    "SYNC_PATHS", "news.jsonl,chunked_articles,dedup_index.npz,top-2.jsonl").split(",") if p]
+SYNC_WORKERS = int(os.environ.get("SYNC_WORKERS", "8"))
+SYNC_CHUNK_MB = int(os.environ.get("SYNC_CHUNK_MB", "8"))      # multiple of 256 KiB
+SYNC_COMPOSE_MB = int(os.environ.get("SYNC_COMPOSE_MB", "64"))
+MAX_COMPOSE_PARTS = 32  # GCS limit per compose request
+TEMP_SUFFIXES = (".part", ".tmp")  # files still being written here
+PART_NAME = re.compile(r"\.part-\d{3}$")  # leftovers of an interrupted composed upload
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide storage client (anonymous against an emulator)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google.cloud import storage
+            if os.environ.get("STORAGE_EMULATOR_HOST"):
+                from google.auth.credentials import AnonymousCredentials
+                _client = storage.Client(project=os.environ.get("GOOGLE_CLOUD_PROJECT", "test"),
+                                         credentials=AnonymousCredentials())
+            else:
+                _client = storage.Client()
+    return _client
+
+
+def _crc32c(blocks):
+    import google_crc32c
+    checksum = google_crc32c.Checksum()
+    for block in blocks:
+        checksum.update(block)
+    return base64.b64encode(checksum.digest()).decode("ascii")
+
+
+def crc32c(path):
+    """Base64 CRC32C of a file, as GCS reports it (blob.crc32c)."""
+    with open(path, "rb") as f:
+        return _crc32c(iter(lambda: f.read(1 << 20), b""))
+
+
+def local_files(paths, data_dir=DATA_DIR):
+    """{relative name: path} for the files under the given paths."""
+    files = {}
+    for name in paths:
+        path = data_dir / name
+        if path.is_dir():
+            files.update({p.relative_to(data_dir).as_posix(): p
+                          for p in sorted(path.rglob("*"))
+                          if p.is_file() and p.suffix not in TEMP_SUFFIXES})
+        elif path.is_file():
+            files[name] = path
+        else:
+            log.debug("sync: %s does not exist, skipped", path)
+    return files
+
+
+def remote_blobs(bucket, paths, prefix=SYNC_PREFIX):
+    """({relative name: blob}, {relative name: [leftover part blobs]}) under the given paths."""
+    blobs, parts = {}, {}
+    for name in paths:
+        for blob in bucket.client.list_blobs(bucket, prefix=f"{prefix}/{name}"):
+            rel = blob.name[len(prefix) + 1:]
+            target = PART_NAME.sub("", rel)
+            # prefix listing also matches e.g. news.jsonl.bak; keep exact names and dirs
+            if target != name and not target.startswith(name.rstrip("/") + "/"):
+                continue
+            if target != rel:
+                parts.setdefault(target, []).append(blob)
+            else:
+                blobs[rel] = blob
+    return blobs, parts
+
+
+def unchanged(path, blob):
+    return blob is not None and blob.size == path.stat().st_size and blob.crc32c == crc32c(path)
+
+
+def delete_blobs(blobs):
+    """Deletes blobs; a failure is only logged (the next push retries it)."""
+    for blob in blobs:
+        try:
+            blob.delete()
+        except Exception as ex:
+            log.warning("sync: could not delete %s :: %s", blob.name, ex)
+
+
+def upload_composed(bucket, path, name, size, leftovers=()):
+    """Uploads parts of path in parallel and composes them into name.
+
+    leftovers: part blobs of an earlier, interrupted upload of name; a part
+    whose size and CRC32C match is reused instead of sent again.
+    """
+    n_parts = min(MAX_COMPOSE_PARTS, -(-size // (SYNC_COMPOSE_MB << 20)))
+    part_size = -(-size // n_parts)
+    existing = {blob.name: blob for blob in leftovers}
+
+    def put(i):
+        part_name = f"{name}.part-{i:03d}"
+        with open(path, "rb") as f:
+            f.seek(i * part_size)
+            data = f.read(part_size)
+        old = existing.get(part_name)
+        if old is not None and old.size == len(data) and old.crc32c == _crc32c([data]):
+            return old
+        part = bucket.blob(part_name)
+        part.upload_from_string(data, content_type="application/octet-stream")
+        return part
+
+    with ThreadPoolExecutor(max_workers=min(SYNC_WORKERS, n_parts)) as pool:
+        parts = list(pool.map(put, range(n_parts)))
+    bucket.blob(name).compose(parts)
+    # This upload's parts, and any extra ones from an earlier, larger version
+    delete_blobs({blob.name: blob for blob in [*parts, *leftovers]}.values())
+
+
+def upload(bucket, path, name, leftovers=()):
+    size = path.stat().st_size
+    if size > SYNC_COMPOSE_MB << 20:
+        upload_composed(bucket, path, name, size, leftovers)
+    else:
+        # chunk_size makes the upload resumable, sent in chunk_size pieces
+        chunk_size = SYNC_CHUNK_MB << 20 if size > SYNC_CHUNK_MB << 20 else None
+        bucket.blob(name, chunk_size=chunk_size).upload_from_filename(str(path))
+        delete_blobs(leftovers)
+    return size
+
+
+def download(blob, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    blob.download_to_filename(str(tmp), checksum="crc32c")
+    os.replace(tmp, path)
+    return blob.size
+
+
+def _transfer(jobs, what):
+    """Runs (fn, args, name) jobs in parallel; returns (files, bytes, errors)."""
+    done, moved, errors = 0, 0, 0
+
+    def run(job):
+        fn, args, name = job
+        t0 = time.perf_counter()
+        size = fn(*args)
+        metrics.observe(what, time.perf_counter() - t0)
+        return name, size
+
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+        futures = [pool.submit(run, job) for job in jobs]
+        for future in futures:
+            try:
+                name, size = future.result()
+            except Exception as ex:
+                errors += 1
+                metrics.count(f"{what}_errors")
+                log.error("sync: %s failed :: %s", what, ex)
+                continue
+            done += 1
+            moved += size
+            log.debug("sync: %s %s (%d bytes)", what, name, size)
+    return done, moved, errors
+
+
+def push(paths=SYNC_PATHS, bucket_name=BUCKET_NAME, prefix=SYNC_PREFIX, data_dir=DATA_DIR):
+    """Uploads new or changed files under data_dir/paths to gs://bucket/prefix/."""
+    bucket = get_client().bucket(bucket_name)
+    files = local_files(paths, data_dir)
+    blobs, parts = remote_blobs(bucket, paths, prefix)
+    jobs = [(upload, (bucket, path, f"{prefix}/{name}", parts.pop(name, ())), name)
+            for name, path in files.items() if not unchanged(path, blobs.get(name))]
+    # Parts of files that are not uploaded now (unchanged or gone) are no longer needed
+    delete_blobs(blob for leftover in parts.values() for blob in leftover)
+    done, moved, errors = _transfer(jobs, "upload")
+    log.info("sync: pushed %d files (%.1f MB) to gs://%s/%s, %d unchanged, %d failed",
+             done, moved / 1e6, bucket_name, prefix, len(files) - len(jobs), errors)
+    return errors == 0
+
+
+def pull(paths=SYNC_PATHS, bucket_name=BUCKET_NAME, prefix=SYNC_PREFIX, data_dir=DATA_DIR):
+    """Downloads new or changed objects under gs://bucket/prefix/paths into data_dir."""
+    bucket = get_client().bucket(bucket_name)
+    blobs, _ = remote_blobs(bucket, paths, prefix)
+    jobs = []
+    for name, blob in blobs.items():
+        path = data_dir / name
+        if not (path.is_file() and unchanged(path, blob)):
+            jobs.append((download, (blob, path), name))
+    done, moved, errors = _transfer(jobs, "download")
+    log.info("sync: pulled %d files (%.1f MB) from gs://%s/%s, %d unchanged, %d failed",
+             done, moved / 1e6, bucket_name, prefix, len(blobs) - len(jobs), errors)
+    return errors == 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("direction", choices=("push", "pull"))
+    ap.add_argument("paths", nargs="*", default=SYNC_PATHS, help="paths under the data dir")
+    ap.add_argument("--bucket", default=BUCKET_NAME)
+    ap.add_argument("--prefix", default=SYNC_PREFIX)
+    ap.add_argument("--data-dir", type=pathlib.Path, default=DATA_DIR)
+    args = ap.parse_args()
+    fn = push if args.direction == "push" else pull
+    ok = fn(args.paths, args.bucket, args.prefix.strip("/"), args.data_dir)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        metrics.finish()
@@ -0,0 +1,40 @@
+from dedup import MinHashLSH, article_key, minhash, similarity
+
+STORY = ("The university announced on Tuesday that it will open a new research "
+         "center for climate science next fall, funded by a gift from alumni. "
+         "The center will host forty researchers and offer public lectures, "
+         "and its first director will be named in the spring.")
+OTHER = ("Local farmers report a record apple harvest this year after a mild "
+         "spring and a warm, dry summer that kept pests away from the orchards.")
+
+
+def test_minhash_similarity():
+    assert similarity(minhash(STORY), minhash(STORY)) == 1.0
+    assert similarity(minhash(STORY), minhash(OTHER)) < 0.2
+
+
+def test_lsh_finds_near_duplicates_only():
+    index = MinHashLSH(threshold=0.8)
+    assert index.check("https://a/story", STORY) is None
+    assert index.check("https://b/other", OTHER) is None
+    # Syndicated copy with a different last sentence
+    copy = STORY.replace("in the spring.", "in the spring, officials said.")
+    key, score = index.check("https://c/copy", copy)
+    assert key == "https://a/story" and score >= 0.8
+    assert len(index) == 2  # duplicates are not indexed
+
+
+def test_index_round_trip(tmp_path):
+    path = tmp_path / "dedup_index.npz"
+    index = MinHashLSH()
+    index.check("https://a/story", STORY)
+    index.save(path)
+    again = MinHashLSH.open(path)
+    assert len(again) == 1
+    assert again.check("https://d/again", STORY)[0] == "https://a/story"
+
+
+def test_article_key_is_the_entry_link_not_the_feed():
+    item = {"link": "https://a/story", "source_link": "https://a/feed", "title": "Story"}
+    assert article_key(item) == "https://a/story"
+    assert article_key({"source_link": "https://a/feed", "title": "Story"}) == "Story"
@@ -0,0 +1,86 @@
+"""Resuming an interrupted load; needs a throwaway Postgres with pgvector.
+
+TEST_DATABASE_URL=postgresql://... python -m pytest services/loader/test_loader.py
+(from the repository root). The tables go into a temporary schema that is
+dropped afterwards.
+"""
+import json, os, uuid
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+TEST_DB_URL = os.environ.get("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not TEST_DB_URL, reason="TEST_DATABASE_URL not set")
+
+import loader, schema
+from logs import get_logger, Progress
+
+
+@pytest.fixture
+def cur():
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    with psycopg.connect(TEST_DB_URL, autocommit=True) as conn, conn.cursor() as cur:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+        cur.execute(f"CREATE SCHEMA {name}; SET search_path TO {name}, public;")
+        try:
+            schema.create(cur)
+            schema.ensure_load_schema(cur)
+            yield cur
+        finally:
+            cur.execute(f"DROP SCHEMA {name} CASCADE;")
+
+
+def chunk_file(tmp_path):
+    """Five chunks of two articles; article b's vectors average to [0.5, 0.5, 0, ...]."""
+    dim = schema.EMBEDDING_DIM
+
+    def vector(i):
+        v = [0.0] * dim
+        v[i] = 1.0
+        return v
+
+    rows = [("a", 0, vector(0)), ("a", 1, vector(0)), ("a", 2, vector(0)),
+            ("b", 0, vector(0)), ("b", 1, vector(1))]
+    fp = tmp_path / "chunks-char-split-test.jsonl"
+    fp.write_text("".join(json.dumps({
+        "article_id": a, "title": a, "chunk": f"{a} chunk {i}", "chunk_index": i,
+        "source_link": f"https://x/{a}", "embedding": v,
+        "embedding_model": "text-embedding-004", "embedding_dim": dim}) + "\n"
+        for a, i, v in rows))
+    return fp
+
+
+def test_resume_after_an_interrupted_load(cur, tmp_path, monkeypatch):
+    fp = chunk_file(tmp_path)
+    progress = Progress(get_logger("test"), "rows")
+    monkeypatch.setattr(loader, "LOAD_COMMIT_ROWS", 2)
+
+    def interrupted(cur, centroids):
+        raise RuntimeError("connection lost")
+
+    # The last transaction (row 5, centroids, done) fails and is rolled back
+    with monkeypatch.context() as m:
+        m.setattr(loader, "store_centroids", interrupted)
+        with pytest.raises(RuntimeError):
+            loader.load_file(cur, fp, set(), progress)
+    cur.execute("SELECT count(*) FROM chunks_vector;")
+    assert cur.fetchone()[0] == 4
+    stat = fp.stat()
+    assert schema.load_checkpoint(cur, fp.name, stat.st_size, stat.st_mtime) == (4, False)
+    cur.execute("SELECT count(*) FROM articles_vector;")
+    assert cur.fetchone()[0] == 0
+
+    # The next load resumes after line 4 and rebuilds both centroids
+    loader.load_file(cur, fp, set(), progress)
+    cur.execute("SELECT article_id, chunk_index FROM chunks_vector ORDER BY 1, 2;")
+    assert cur.fetchall() == [("a", 0), ("a", 1), ("a", 2), ("b", 0), ("b", 1)]
+    cur.execute("SELECT article_id, n_chunks, embedding::text FROM articles_vector ORDER BY 1;")
+    (a, a_n, a_vec), (b, b_n, b_vec) = cur.fetchall()
+    assert (a, a_n, b, b_n) == ("a", 3, "b", 2)
+    assert json.loads(b_vec)[:3] == [0.5, 0.5, 0]
+    assert schema.load_checkpoint(cur, fp.name, stat.st_size, stat.st_mtime) == (5, True)
+
+    # Done files are skipped
+    loader.load_file(cur, fp, set(), progress)
+    cur.execute("SELECT count(*) FROM chunks_vector;")
+    assert cur.fetchone()[0] == 5
@@ -0,0 +1,136 @@
+import os
+
+import pytest
+
+pytest.importorskip("google_crc32c")
+
+import sync
+
+
+class FakeBlob:
+    """The few google.cloud.storage.Blob members sync.py uses, over FakeBucket.objects."""
+
+    def __init__(self, bucket, name):
+        self.bucket, self.name = bucket, name
+
+    @property
+    def size(self):
+        return len(self.bucket.objects[self.name])
+
+    @property
+    def crc32c(self):
+        return sync._crc32c([self.bucket.objects[self.name]])
+
+    def upload_from_string(self, data, content_type=None):
+        if self.name in self.bucket.fail:
+            self.bucket.fail.discard(self.name)
+            raise ConnectionError(f"upload of {self.name} interrupted")
+        self.bucket.uploads.append(self.name)
+        self.bucket.objects[self.name] = data
+
+    def upload_from_filename(self, filename):
+        with open(filename, "rb") as f:
+            self.upload_from_string(f.read())
+
+    def compose(self, parts):
+        self.bucket.objects[self.name] = b"".join(self.bucket.objects[p.name] for p in parts)
+
+    def delete(self):
+        del self.bucket.objects[self.name]
+
+    def download_to_filename(self, filename, checksum=None):
+        with open(filename, "wb") as f:
+            f.write(self.bucket.objects[self.name])
+
+
+class FakeBucket:
+
+    def __init__(self):
+        self.client = self
+        self.objects, self.uploads, self.fail = {}, [], set()
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name, chunk_size=None):
+        return FakeBlob(self, name)
+
+    def list_blobs(self, bucket, prefix):
+        return [FakeBlob(self, n) for n in sorted(self.objects) if n.startswith(prefix)]
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    fake = FakeBucket()
+    monkeypatch.setattr(sync, "_client", fake)
+    return fake
+
+
+@pytest.fixture
+def data(tmp_path):
+    (tmp_path / "chunked_articles").mkdir()
+    (tmp_path / "chunked_articles" / "a.jsonl").write_text("a\n")
+    (tmp_path / "chunked_articles" / "b.jsonl").write_text("b\n")
+    (tmp_path / "chunked_articles" / "c.jsonl.tmp").write_text("still being written")
+    (tmp_path / "news.jsonl").write_text("news\n")
+    (tmp_path / "news.jsonl.bak").write_text("not synced")
+    return tmp_path
+
+
+def push(data):
+    return sync.push(["news.jsonl", "chunked_articles"], "bucket", "artifacts", data)
+
+
+def test_push_skips_unchanged_files(bucket, data):
+    assert push(data)
+    assert sorted(bucket.uploads) == ["artifacts/chunked_articles/a.jsonl",
+                                      "artifacts/chunked_articles/b.jsonl", "artifacts/news.jsonl"]
+    bucket.uploads.clear()
+    assert push(data)
+    assert bucket.uploads == []
+    (data / "news.jsonl").write_text("more news\n")
+    assert push(data)
+    assert bucket.uploads == ["artifacts/news.jsonl"]
+
+
+def test_pull_skips_unchanged_files(bucket, data, tmp_path_factory):
+    push(data)
+    out = tmp_path_factory.mktemp("pulled")
+    (out / "news.jsonl").write_text("news\n")  # already up to date
+    assert sync.pull(["news.jsonl", "chunked_articles"], "bucket", "artifacts", out)
+    assert (out / "chunked_articles" / "a.jsonl").read_text() == "a\n"
+    assert sorted(p.name for p in out.rglob("*")) == ["a.jsonl", "b.jsonl", "chunked_articles", "news.jsonl"]
+
+
+def big_file(data, monkeypatch):
+    monkeypatch.setattr(sync, "SYNC_COMPOSE_MB", 1)
+    content = os.urandom(3 << 20)  # three 1 MB parts
+    (data / "news.jsonl").write_bytes(content)
+    return content
+
+
+def test_big_files_are_composed_from_parts(bucket, data, monkeypatch):
+    content = big_file(data, monkeypatch)
+    assert push(data)
+    assert bucket.objects["artifacts/news.jsonl"] == content
+    assert not any(sync.PART_NAME.search(n) for n in bucket.objects)
+
+
+def test_interrupted_compose_resumes_with_the_missing_parts(bucket, data, monkeypatch):
+    content = big_file(data, monkeypatch)
+    bucket.fail.add("artifacts/news.jsonl.part-002")
+    assert not push(data)
+    assert "artifacts/news.jsonl" not in bucket.objects
+
+    bucket.uploads.clear()
+    assert push(data)
+    assert bucket.uploads == ["artifacts/news.jsonl.part-002"]
+    assert bucket.objects["artifacts/news.jsonl"] == content
+    assert not any(sync.PART_NAME.search(n) for n in bucket.objects)
+
+
+def test_leftover_parts_of_unchanged_files_are_deleted(bucket, data):
+    push(data)
+    bucket.objects["artifacts/chunked_articles/a.jsonl.part-000"] = b"stale"
+    assert push(data)
+    assert "artifacts/chunked_articles/a.jsonl.part-000" not in bucket.objects
@@ -0,0 +1,119 @@
+'''
+Benchmark + parity check: SentenceTransformer on PyTorch vs ONNX Runtime int8
+
+Each backend runs in a fresh subprocess so cold start (import + model load)
+and peak RSS are measured in isolation. Reports sentences/sec, cold-start
+seconds and peak RSS, then checks that the int8 model preserves the cosine
+similarities of the PyTorch model on the same sentences:
+
+* per sentence: cosine(torch embedding, onnx embedding)
+* pairwise:     max |cos_torch(a, b) - cos_onnx(a, b)| over all sentence pairs
+
+Exits non-zero when parity is below --min-cosine / above --max-sim-diff,
+so it can gate CI.
+
+Usage (retriever container, pip install .[onnx]):
+  python bench_encoder.py --model sentence-transformers/all-mpnet-base-v2 -n 512
+'''
+
+import argparse, json, os, pathlib, resource, subprocess, sys, tempfile, time
+
+import numpy as np
+
+PATH_TO_CHUNKS = pathlib.Path("/data/chunked_articles")
+SAMPLE_CHUNKS = pathlib.Path(__file__).resolve().parents[1] / "loader" / "chunked_articles"
+
+FALLBACK_SENTENCES = [
+    "Harvard researchers report new findings on early childhood development.",
+    "The city council approved the budget after a lengthy debate.",
+    "Scientists discover a new species of frog in the Amazon rainforest.",
+    "Aphorisms condense wisdom into a single memorable sentence.",
+    "Mandatory retirement ages for judges remain a contested idea.",
+    "Dogs that faced adversity early in life show more fearfulness.",
+    "The university announced a new initiative on climate research.",
+    "Local elections saw record turnout among young voters.",
+]
+
+
+def load_sentences(n):
+    texts = []
+    for folder in (PATH_TO_CHUNKS, SAMPLE_CHUNKS):
+        for fp in sorted(folder.glob("*.jsonl")):
+            with fp.open("r", encoding="utf-8") as f:
+                texts += [json.loads(line)["chunk"] for line in f if line.strip()]
+        if texts:
+            break
+    texts = texts or FALLBACK_SENTENCES
+    return [texts[i % len(texts)] for i in range(n)]
+
+
+def worker(backend, model, n, batch_size, out):
+    """Runs in a subprocess: load, encode, report timings and peak RSS."""
+    t0 = time.perf_counter()
+    from encoders import SentenceTransformerEncoder
+    enc = SentenceTransformerEncoder(model, None, backend=backend)
+    enc.model.encode(["warm up"])
+    cold_start = time.perf_counter() - t0
+
+    sentences = load_sentences(n)
+    t0 = time.perf_counter()
+    emb = enc.model.encode(sentences, batch_size=batch_size, normalize_embeddings=True)
+    elapsed = time.perf_counter() - t0
+    np.save(out, emb)
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+    print(json.dumps({"backend": backend, "cold_start_s": cold_start,
+                      "sentences_per_s": n / elapsed, "peak_rss_mb": peak_kb / 1024}))
+
+
+def run_worker(backend, args, out):
+    cmd = [sys.executable, __file__, "--worker", backend, "--model", args.model,
+           "-n", str(args.n), "--batch-size", str(args.batch_size), "--out", out]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise SystemExit(f"[bench] {backend} worker failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="sentence-transformers/all-mpnet-base-v2")
+    ap.add_argument("-n", type=int, default=512, help="sentences to encode")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--min-cosine", type=float, default=0.98)
+    ap.add_argument("--max-sim-diff", type=float, default=0.05)
+    ap.add_argument("--worker", choices=["torch", "onnx-int8"], help=argparse.SUPPRESS)
+    ap.add_argument("--out", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.model, args.n, args.batch_size, args.out)
+        return
+
+    tmp = tempfile.mkdtemp(prefix="bench_encoder_")
+    results, embs = {}, {}
+    for backend in ("torch", "onnx-int8"):
+        out = os.path.join(tmp, f"{backend}.npy")
+        results[backend] = run_worker(backend, args, out)
+        embs[backend] = np.load(out)
+
+    print(f"[bench] {args.model}, {args.n} sentences, batch {args.batch_size}, CPU")
+    print(f"{'backend':<10} {'sent/s':>8} {'cold start s':>13} {'peak RSS MB':>12}")
+    for r in results.values():
+        print(f"{r['backend']:<10} {r['sentences_per_s']:>8.1f} {r['cold_start_s']:>13.2f} {r['peak_rss_mb']:>12.0f}")
+
+    a, b = embs["torch"], embs["onnx-int8"]
+    per_sentence = np.sum(a * b, axis=1)
+    sim_diff = np.abs(a @ a.T - b @ b.T).max()
+    print(f"[parity] cosine(torch, onnx-int8): mean {per_sentence.mean():.4f} min {per_sentence.min():.4f}")
+    print(f"[parity] max pairwise similarity difference: {sim_diff:.4f}")
+
+    if per_sentence.min() < args.min_cosine or sim_diff > args.max_sim_diff:
+        print("[parity] FAILED", file=sys.stderr)
+        sys.exit(1)
+    print("[parity] ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+'''
+Benchmark: full-precision vs halfvec vs binary HNSW index on chunks_vector
+
+For each storage mode: builds the index (timed), reports its size on disk,
+and runs a fixed query set through retriever.search() (kNN on the index +
+exact re-scoring) to measure latency and recall@k against an exact
+sequential scan on the full-precision embedding column.
+
+Queries are stored chunk embeddings with a little noise added, so the run
+needs no embedding model and is repeatable for a given --seed.
+
+Usage (retriever container, DB reachable):
+  python bench_quant.py --queries 100 -k 10 --modes float halfvec binary
+'''
+
+import argparse, time
+
+import numpy as np
+import psycopg
+from pgvector.psycopg import register_vector, Vector
+
+from retriever import DB_URL, EMBEDDING_DIM, RESCORE_FACTOR, search
+
+# Same definitions as VECTOR_INDEXES in services/loader/schema.py
+VECTOR_INDEXES = {
+    "float": ("chunks_vector_embedding_hnsw",
+              "hnsw (embedding vector_cosine_ops)"),
+    "halfvec": ("chunks_vector_embedding_half_hnsw",
+                f"hnsw ((embedding::halfvec({EMBEDDING_DIM})) halfvec_cosine_ops)"),
+    "binary": ("chunks_vector_embedding_bit_hnsw",
+               f"hnsw ((binary_quantize(embedding)::bit({EMBEDDING_DIM})) bit_hamming_ops)"),
+}
+
+
+def relation_size(cur, name):
+    """On-disk size in bytes; sums the partitions of a partitioned table/index."""
+    cur.execute(
+        """
+        SELECT coalesce(sum(pg_total_relation_size(inhrelid)),
+                        pg_total_relation_size(%s::regclass))
+        FROM pg_inherits
+        WHERE inhparent = %s::regclass;
+        """,
+        (name, name),
+    )
+    return int(cur.fetchone()[0])
+
+
+def sample_queries(cur, n, noise, seed):
+    cur.execute("SELECT setseed(%s);", (seed / 2**31,))
+    cur.execute("SELECT embedding FROM chunks_vector ORDER BY random() LIMIT %s;", (n,))
+    base = np.array([row[0] for row in cur.fetchall()], dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    queries = base + noise * rng.standard_normal(base.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def exact_ids(cur, queries, k):
+    """Ground truth: sequential scan over the full-precision column."""
+    cur.execute("SET enable_indexscan = off;")
+    truth = []
+    for q in queries:
+        cur.execute("SELECT id FROM chunks_vector ORDER BY embedding <=> %s LIMIT %s;",
+                    (Vector(q), k))
+        truth.append({row[0] for row in cur.fetchall()})
+    cur.execute("RESET enable_indexscan;")
+    return truth
+
+
+def bench_mode(cur, mode, queries, truth, k, rebuild):
+    name, method = VECTOR_INDEXES[mode]
+    if rebuild:
+        cur.execute(f"DROP INDEX IF EXISTS {name};")
+    t0 = time.perf_counter()
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON chunks_vector USING {method};")
+    build_s = time.perf_counter() - t0
+
+    latencies, recalls = [], []
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        rows = search(cur, Vector(q), k, quant=mode)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        recalls.append(len({row[0] for row in rows} & expected) / k)
+
+    return {
+        "mode": mode,
+        "index_mb": relation_size(cur, name) / 2**20,
+        "build_s": build_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "recall": float(np.mean(recalls)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--modes", nargs="+", default=list(VECTOR_INDEXES), choices=list(VECTOR_INDEXES))
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("-k", type=int, default=10)
+    ap.add_argument("--noise", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--rebuild", action="store_true", help="drop and rebuild existing indexes (times the build)")
+    args = ap.parse_args()
+
+    with psycopg.connect(DB_URL, autocommit=True) as conn:
+        register_vector(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM chunks_vector;")
+            n_rows = cur.fetchone()[0]
+            print(f"[bench] chunks_vector: {n_rows} rows, "
+                  f"{relation_size(cur, 'chunks_vector') / 2**20:.1f} MB incl. indexes; "
+                  f"rescore factor {RESCORE_FACTOR}")
+
+            queries = sample_queries(cur, args.queries, args.noise, args.seed)
+            truth = exact_ids(cur, queries, args.k)
+
+            print(f"{'mode':<8} {'index MB':>9} {'build s':>8} {'p50 ms':>7} {'p95 ms':>7} {'recall@' + str(args.k):>9}")
+            for mode in args.modes:
+                r = bench_mode(cur, mode, queries, truth, args.k, args.rebuild)
+                print(f"{r['mode']:<8} {r['index_mb']:>9.1f} {r['build_s']:>8.2f} "
+                      f"{r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['recall']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
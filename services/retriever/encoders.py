@@ -0,0 +1,118 @@
+'''
+Query encoders, keyed by the embedding model recorded on the stored rows
+
+The loader registers every (model, dim) it writes in the embedding_models
+table and on each chunks_vector / articles_vector row. The retriever must
+encode the query with that same model and dimension; otherwise query and
+chunk vectors live in different spaces and the kNN ranking is meaningless.
+'''
+
+import os
+
+import numpy as np
+
+# provider -> encoder class, filled below
+PROVIDERS = {}
+
+# Known models and their provider (embedding_models.provider)
+REGISTRY = {
+    "text-embedding-004": "vertex",
+    "sentence-transformers/all-mpnet-base-v2": "sentence-transformers",
+}
+
+# Rows / chunk files written before the registry existed (loader's Vertex model)
+LEGACY_MODEL = ("text-embedding-004", 768)
+
+# SentenceTransformer runtime on CPU: "torch" (default) or "onnx-int8"
+# (ONNX Runtime with int8 dynamic quantization; pip install .[onnx])
+ST_BACKEND = os.environ.get("ST_BACKEND", "torch")
+ONNX_CACHE = os.environ.get("ONNX_CACHE", "/data/onnx_models")
+# Quantization target: "avx2" runs on any x86-64, "avx512_vnni" / "arm64" are faster where available
+ONNX_QUANT_CONFIG = os.environ.get("ONNX_QUANT_CONFIG", "avx2")
+
+
+class VertexQueryEncoder:
+    """Same call and config as the loader's VertexEmbeddings."""
+
+    def __init__(self, model, dim):
+        from google import genai
+        from google.genai import types
+        project = os.environ.get("GOOGLE_CLOUD_PROJECT")
+        location = os.environ.get("GOOGLE_CLOUD_REGION", "us-central1")
+        if not project:
+            raise RuntimeError("Set GOOGLE_CLOUD_PROJECT")
+        self.client = genai.Client(vertexai=True, project=project, location=location)
+        # auto_truncate=False like the loader: an over-long query is an error, never silently cut
+        self.config = types.EmbedContentConfig(output_dimensionality=dim, auto_truncate=False)
+        self.model = model
+
+    def encode(self, text):
+        resp = self.client.models.embed_content(model=self.model, contents=[text], config=self.config)
+        return np.asarray(resp.embeddings[0].values, dtype=np.float32)
+
+
+def load_onnx_int8(model, dim=None, cache=ONNX_CACHE, config=ONNX_QUANT_CONFIG):
+    """SentenceTransformer on ONNX Runtime with an int8 dynamically quantized graph.
+
+    The first call exports the model to ONNX and quantizes it into
+    <cache>/<model>; later calls (and containers sharing /data) reuse it.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    save_dir = os.path.join(cache, model.replace("/", "__"))
+    file_name = f"onnx/model_qint8_{config}.onnx"
+    if not os.path.exists(os.path.join(save_dir, file_name)):
+        exported = SentenceTransformer(model, backend="onnx", device="cpu")
+        exported.save(save_dir)
+        export_dynamic_quantized_onnx_model(exported, config, save_dir)
+    return SentenceTransformer(save_dir, backend="onnx", device="cpu", truncate_dim=dim,
+                               model_kwargs={"file_name": file_name})
+
+
+class SentenceTransformerEncoder:
+    def __init__(self, model, dim, backend=None):
+        backend = backend or ST_BACKEND
+        if backend == "onnx-int8":
+            self.model = load_onnx_int8(model, dim)
+        elif backend == "torch":
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(model, truncate_dim=dim)
+        else:
+            raise ValueError(f"ST_BACKEND must be 'torch' or 'onnx-int8', got {backend!r}")
+
+    def encode(self, text):
+        return self.model.encode(text)
+
+
+PROVIDERS["vertex"] = VertexQueryEncoder
+PROVIDERS["sentence-transformers"] = SentenceTransformerEncoder
+
+_encoders = {}
+
+
+def get_encoder(model, dim, provider=None):
+    """Returns (and caches) the query encoder for a registered (model, dim)."""
+    key = (model, dim)
+    if key not in _encoders:
+        provider = provider or REGISTRY.get(model)
+        if provider not in PROVIDERS:
+            raise ValueError(f"No query encoder for embedding model {model!r} (provider {provider!r})")
+        _encoders[key] = PROVIDERS[provider](model, dim)
+    return _encoders[key]
+
+
+def choose_model(models, wanted=None):
+    """Picks the (model, dim, provider) to search with.
+
+    models: registered (model, dim, provider) tuples, most recent first.
+    wanted: optional model name to pin (RETRIEVER_EMBEDDING_MODEL).
+    """
+    if not models:
+        raise RuntimeError("No embedding model registered; run the loader first")
+    if wanted:
+        for m in models:
+            if m[0] == wanted:
+                return m
+        raise RuntimeError(f"Embedding model {wanted!r} is not registered; "
+                           f"stored rows use {[m[0] for m in models]}")
+    return models[0]
@@ -0,0 +1,350 @@
+'''
+Local vector store
+
+Offline stand-in for chunks_vector / articles_vector, for benchmarks and CI
+runs without the Cloud SQL proxy. Exposes the same search(),
+search_articles() and search_two_stage() calls as PgVectorStore in
+retriever.py and returns rows of the same shape:
+
+  (id, article_id, chunk_index, title, chunk, published_at, source_link, score)
+
+with score = cosine distance, as pgvector's <=>.
+
+Index directory (built from the loader's chunk files):
+  vectors.npy    float32 matrix, L2-normalized, opened memory-mapped
+  meta.jsonl     one line per row with the chunk text and metadata
+  index.faiss    optional FAISS HNSW index    (--ann faiss,   pip install faiss-cpu)
+  index.hnsw     optional hnswlib index       (--ann hnswlib, pip install hnswlib)
+
+Usage:
+  python local_store.py --build [--ann hnswlib]          # /data/chunked_articles -> /data/local_index
+  python local_store.py --bench --synthetic 100000 --ann hnswlib
+'''
+
+import argparse, json, pathlib, sys, tempfile, time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from encoders import LEGACY_MODEL, REGISTRY
+
+PATH_TO_CHUNKS = pathlib.Path("/data/chunked_articles")
+PATH_TO_INDEX = pathlib.Path("/data/local_index")
+
+# ANN candidates fetched per requested row when metadata filters are set
+FILTER_OVER_FETCH = 10
+
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+
+def _normalize(m):
+    m = np.asarray(m, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return m / np.maximum(norms, 1e-12)
+
+
+def _to_dt64(value):
+    """ISO string / datetime -> naive UTC datetime64[s] (NaT when missing)."""
+    if not value:
+        return np.datetime64("NaT", "s")
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, "s")
+
+
+class LocalVectorStore:
+    def __init__(self, path, vectors, meta, ann=None, index=None):
+        self.path = pathlib.Path(path)
+        self.vectors = vectors  # (n, dim) float32, L2-normalized
+        self.meta = meta
+        self.ann = ann
+        self.index = index
+
+        self.article_ids = np.array([m["article_id"] for m in meta], dtype=object)
+        self.published = np.array([_to_dt64(m.get("published_at")) for m in meta],
+                                  dtype="datetime64[s]")
+        self.source_type = np.array([m.get("source_type") for m in meta], dtype=object)
+        self.source_link = np.array([m.get("source_link") for m in meta], dtype=object)
+        # Chunk files from before the model registry: loader's Vertex model
+        self.embedding_model = np.array([m.get("embedding_model") or LEGACY_MODEL[0] for m in meta],
+                                        dtype=object)
+        self.embedding_dim = np.array([m.get("embedding_dim") or vectors.shape[1] for m in meta])
+        self._centroids = None
+
+    # ---------- Build / open ----------
+    @classmethod
+    def build(cls, chunk_files, path=PATH_TO_INDEX, ann=None):
+        """Reads the loader's chunk JSONL files and writes an index directory."""
+        path = pathlib.Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        meta, vectors = [], []
+        for fp in chunk_files:
+            with open(fp, "r", encoding="utf-8") as f:
+                for i, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        obj = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        print(f"[skip] {fp}:{i} bad JSON: {e}", file=sys.stderr)
+                        continue
+                    vectors.append(obj.pop("embedding"))
+                    meta.append(obj)
+        return cls.from_arrays(path, np.asarray(vectors, dtype=np.float32), meta, ann)
+
+    @classmethod
+    def from_arrays(cls, path, vectors, meta, ann=None):
+        path = pathlib.Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        if not len(meta):
+            # No chunk files yet: an empty (0, dim) matrix, not np.asarray([])'s (0,)
+            vectors = np.zeros((0, LEGACY_MODEL[1]), dtype=np.float32)
+        np.save(path / "vectors.npy", _normalize(vectors))
+        with open(path / "meta.jsonl", "w", encoding="utf-8") as f:
+            for m in meta:
+                f.write(json.dumps(m, ensure_ascii=False) + "\n")
+        store = cls.open(path)
+        if ann and len(meta):
+            store.build_ann(ann)
+        return store
+
+    @classmethod
+    def open(cls, path=PATH_TO_INDEX, ann=None):
+        path = pathlib.Path(path)
+        vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        with open(path / "meta.jsonl", "r", encoding="utf-8") as f:
+            meta = [json.loads(line) for line in f if line.strip()]
+        store = cls(path, vectors, meta)
+        if ann and len(meta):
+            store.load_ann(ann)
+        return store
+
+    def build_ann(self, ann):
+        n, dim = self.vectors.shape
+        data = np.ascontiguousarray(self.vectors)
+        if ann == "faiss":
+            import faiss
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.add(data)
+            faiss.write_index(index, str(self.path / "index.faiss"))
+        elif ann == "hnswlib":
+            import hnswlib
+            index = hnswlib.Index(space="ip", dim=dim)
+            index.init_index(max_elements=n, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+            index.add_items(data, np.arange(n))
+            index.save_index(str(self.path / "index.hnsw"))
+        else:
+            raise ValueError(f"ann must be 'faiss' or 'hnswlib', got {ann!r}")
+        self.ann, self.index = ann, index
+
+    def load_ann(self, ann):
+        n, dim = self.vectors.shape
+        if ann == "faiss":
+            import faiss
+            index = faiss.read_index(str(self.path / "index.faiss"))
+        elif ann == "hnswlib":
+            import hnswlib
+            index = hnswlib.Index(space="ip", dim=dim)
+            index.load_index(str(self.path / "index.hnsw"), max_elements=n)
+        else:
+            raise ValueError(f"ann must be 'faiss' or 'hnswlib', got {ann!r}")
+        self.ann, self.index = ann, index
+
+    # ---------- Helpers ----------
+    def _mask(self, since=None, until=None, source_type=None, source_link=None,
+              embedding_model=None, embedding_dim=None):
+        """Boolean row mask for the metadata filters, or None when no filter is set."""
+        mask = None
+
+        def _and(m, cond):
+            return cond if m is None else m & cond
+
+        if since is not None:
+            mask = _and(mask, self.published >= _to_dt64(since))
+        if until is not None:
+            mask = _and(mask, self.published < _to_dt64(until))
+        if source_type:
+            mask = _and(mask, self.source_type == source_type)
+        if source_link:
+            mask = _and(mask, self.source_link == source_link)
+        if embedding_model:
+            mask = _and(mask, self.embedding_model == embedding_model)
+        if embedding_dim:
+            mask = _and(mask, self.embedding_dim == embedding_dim)
+        return mask
+
+    def _exact(self, q, n, mask=None, rows=None):
+        """Top-n (row ids, similarities) by brute force, best first."""
+        ids = np.arange(len(self.vectors)) if rows is None else rows
+        sims = self.vectors[ids] @ q if rows is not None else self.vectors @ q
+        if mask is not None:
+            keep = mask[ids]
+            ids, sims = ids[keep], sims[keep]
+        if n < len(ids):
+            top = np.argpartition(-sims, n)[:n]
+            ids, sims = ids[top], sims[top]
+        order = np.argsort(-sims, kind="stable")
+        return ids[order], sims[order]
+
+    def _approx(self, q, n, mask=None):
+        fetch = min(len(self.vectors), n * FILTER_OVER_FETCH if mask is not None else n)
+        if self.ann == "faiss":
+            self.index.hnsw.efSearch = max(HNSW_EF_SEARCH, fetch)
+            sims, ids = self.index.search(q[None, :], fetch)
+            ids, sims = ids[0], sims[0]
+        else:
+            self.index.set_ef(max(HNSW_EF_SEARCH, fetch))
+            ids, dists = self.index.knn_query(q[None, :], k=fetch)
+            ids, sims = ids[0].astype(np.int64), 1.0 - dists[0]
+        keep = ids >= 0
+        if mask is not None:
+            keep &= mask[np.where(keep, ids, 0)]
+        ids, sims = ids[keep][:n], sims[keep][:n]
+        if mask is not None and len(ids) < n:
+            # Filter too selective for the ANN pool: fall back to exact
+            return self._exact(q, n, mask)
+        return ids, sims
+
+    def _candidates(self, q, n, mask=None):
+        if self.index is not None:
+            return self._approx(q, n, mask)
+        return self._exact(q, n, mask)
+
+    def _row(self, i, dist):
+        m = self.meta[i]
+        return (int(i), m.get("article_id"), m.get("chunk_index"), m.get("title"),
+                m.get("chunk"), m.get("published_at"), m.get("source_link"), float(dist))
+
+    def _top_articles(self, ids, sims, k, agg, chunks_per_article):
+        """Groups ranked chunk candidates by article (order of first appearance)."""
+        groups = {}
+        for i, sim in zip(ids, sims):
+            groups.setdefault(self.article_ids[i], []).append((i, 1.0 - float(sim)))
+        if agg == "max":
+            score = {a: c[0][1] for a, c in groups.items()}
+        elif agg == "mean":
+            score = {a: sum(d for _, d in c) / len(c) for a, c in groups.items()}
+        else:
+            raise ValueError(f"agg must be 'max' or 'mean', got {agg!r}")
+        best = sorted(groups, key=lambda a: score[a])[:k]
+        return [self._row(i, score[a]) for a in best for i, _ in groups[a][:chunks_per_article]]
+
+    @property
+    def centroids(self):
+        """(article_ids, normalized mean vector per article), computed once."""
+        if self._centroids is None:
+            articles, first, inverse = np.unique(self.article_ids.astype(str),
+                                                 return_index=True, return_inverse=True)
+            sums = np.zeros((len(articles), self.vectors.shape[1]), dtype=np.float32)
+            np.add.at(sums, inverse, self.vectors)
+            self._centroids = (articles, _normalize(sums), inverse, first)
+        return self._centroids
+
+    # ---------- Same interface as PgVectorStore ----------
+    def models(self):
+        """(model, dim, provider) present in the index, most rows first."""
+        pairs, counts = np.unique(np.array([f"{m}\t{d}" for m, d in
+                                            zip(self.embedding_model, self.embedding_dim)]),
+                                  return_counts=True)
+        out = []
+        for pair in pairs[np.argsort(-counts)]:
+            model, dim = pair.split("\t")
+            out.append((model, int(dim), REGISTRY.get(model)))
+        return out
+
+    def search(self, q, k=2, **filters):
+        if not len(self.meta):
+            return []
+        q = _normalize(q)
+        ids, sims = self._candidates(q, k, self._mask(**filters))
+        return [self._row(i, 1.0 - s) for i, s in zip(ids, sims)]
+
+    def search_articles(self, q, k=2, agg="max", over_fetch=10, chunks_per_article=1, **filters):
+        if not len(self.meta):
+            return []
+        q = _normalize(q)
+        ids, sims = self._candidates(q, k * over_fetch, self._mask(**filters))
+        return self._top_articles(ids, sims, k, agg, chunks_per_article)
+
+    def search_two_stage(self, q, k=2, over_fetch=10, chunks_per_article=1, **filters):
+        if not len(self.meta):
+            return []
+        q = _normalize(q)
+        articles, centroids, inverse, first = self.centroids
+        mask = self._mask(**filters)
+        sims = centroids @ q
+        if mask is not None:
+            # Article metadata is taken from its first chunk, as in articles_vector
+            sims = np.where(mask[first], sims, -np.inf)
+        n = min(k * over_fetch, len(articles))
+        coarse = np.argpartition(-sims, n - 1)[:n] if n else np.array([], dtype=np.int64)
+        coarse = coarse[np.isfinite(sims[coarse])]
+        rows = np.flatnonzero(np.isin(inverse, coarse))
+        ids, chunk_sims = self._exact(q, len(rows), rows=rows)
+        return self._top_articles(ids, chunk_sims, k, "max", chunks_per_article)
+
+
+# ---------- Benchmark: exact vs approximate ----------
+def bench(store, n_queries=200, k=10, noise=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(store.vectors), n_queries)
+    queries = _normalize(np.asarray(store.vectors[picks]) +
+                         noise * rng.standard_normal((n_queries, store.vectors.shape[1])))
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        out = [fn(q) for q in queries]
+        return out, (time.perf_counter() - t0) * 1000 / n_queries
+
+    exact, exact_ms = timed(lambda q: set(store._exact(q, k)[0].tolist()))
+    print(f"[bench] n={len(store.vectors)} dim={store.vectors.shape[1]} k={k} queries={n_queries}")
+    print(f"[bench] exact (NumPy)     {exact_ms:8.3f} ms/query")
+    if store.index is not None:
+        approx, approx_ms = timed(lambda q: set(store._approx(q, k)[0].tolist()))
+        recall = np.mean([len(a & e) / k for a, e in zip(approx, exact)])
+        print(f"[bench] approx ({store.ann:<8}) {approx_ms:8.3f} ms/query  "
+              f"recall@{k}={recall:.3f}  speedup={exact_ms / approx_ms:.1f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local vector store (no database)")
+    ap.add_argument("--build", action="store_true", help="build index from chunk files")
+    ap.add_argument("--bench", action="store_true", help="exact vs approximate benchmark")
+    ap.add_argument("--chunks", default=str(PATH_TO_CHUNKS))
+    ap.add_argument("--index", default=str(PATH_TO_INDEX))
+    ap.add_argument("--ann", choices=["faiss", "hnswlib"], default=None)
+    ap.add_argument("--synthetic", type=int, default=0, help="bench on N random vectors")
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("-k", type=int, default=10)
+    args = ap.parse_args()
+
+    if args.build:
+        files = sorted(pathlib.Path(args.chunks).glob("*.jsonl"))
+        store = LocalVectorStore.build(files, args.index, args.ann)
+        print(f"[local] indexed {len(store.meta)} chunks from {len(files)} files into {args.index}")
+
+    if args.bench:
+        if args.synthetic:
+            # Chunks of one article scattered around a common topic vector
+            rng = np.random.default_rng(0)
+            topics = rng.standard_normal((args.synthetic // 10 + 1, args.dim))
+            vectors = (topics[np.arange(args.synthetic) // 10] +
+                       0.5 * rng.standard_normal((args.synthetic, args.dim))).astype(np.float32)
+            meta = [{"article_id": f"a{i // 10}", "chunk_index": i % 10} for i in range(args.synthetic)]
+            tmp = tempfile.mkdtemp(prefix="local_index_")
+            t0 = time.perf_counter()
+            store = LocalVectorStore.from_arrays(tmp, vectors, meta, args.ann)
+            print(f"[bench] built synthetic index in {time.perf_counter() - t0:.1f} s ({tmp})")
+        else:
+            store = LocalVectorStore.open(args.index, args.ann)
+        bench(store, args.queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pytest
+
+from bench_encoder import FALLBACK_SENTENCES
+from encoders import SentenceTransformerEncoder
+
+# The int8 model must keep the torch model's geometry: same bounds as bench_encoder.py
+MODEL = os.environ.get("TEST_ST_MODEL", "sentence-transformers/all-mpnet-base-v2")
+MIN_COSINE = 0.98
+MAX_SIM_DIFF = 0.05
+
+QUERIES = [
+    "child development research at Harvard",
+    "city budget vote",
+    "new frog species found",
+    "retirement age for judges",
+    "youth voter turnout",
+]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        SentenceTransformerEncoder(MODEL, None, backend="tensorrt")
+
+
+@pytest.fixture(scope="module")
+def encoders(tmp_path_factory):
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    import encoders as enc
+    cache = str(tmp_path_factory.mktemp("onnx_models"))
+    torch_model = SentenceTransformerEncoder(MODEL, None, backend="torch").model
+    onnx_model = enc.load_onnx_int8(MODEL, cache=cache)
+    return torch_model, onnx_model
+
+
+def embed(model, texts):
+    return model.encode(texts, normalize_embeddings=True)
+
+
+def test_onnx_int8_matches_torch_embeddings(encoders):
+    a, b = (embed(m, FALLBACK_SENTENCES) for m in encoders)
+    assert np.sum(a * b, axis=1).min() >= MIN_COSINE
+    assert np.abs(a @ a.T - b @ b.T).max() <= MAX_SIM_DIFF
+
+
+def test_onnx_int8_ranks_like_torch(encoders):
+    rankings = []
+    for model in encoders:
+        docs, queries = embed(model, FALLBACK_SENTENCES), embed(model, QUERIES)
+        rankings.append(np.argsort(-(queries @ docs.T), axis=1)[:, :3])
+    torch_top, onnx_top = rankings
+    assert (torch_top[:, 0] == onnx_top[:, 0]).all()
+    assert [set(t) for t in torch_top] == [set(o) for o in onnx_top]
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from local_store import LocalVectorStore
+
+# Three articles, two chunks each, around three orthogonal topics
+TOPICS = np.eye(4, dtype=np.float32)[:3]
+
+
+def chunk_vector(topic, other, weight):
+    return TOPICS[topic] + weight * TOPICS[other]
+
+
+@pytest.fixture
+def store(tmp_path):
+    vectors, meta = [], []
+    for a, (other, dates, source_type) in enumerate([
+            (1, "2025-05-01T08:00:00+00:00", "RSS"),
+            (2, "2025-05-20T08:00:00+00:00", "RSS"),
+            (0, None, "web")]):
+        for c, weight in enumerate((0.1, 0.5)):
+            vectors.append(chunk_vector(a, other, weight))
+            meta.append({"article_id": f"a{a}", "chunk_index": c, "title": f"article {a}",
+                         "chunk": f"a{a} chunk {c}", "published_at": dates,
+                         "source_type": source_type, "source_link": f"https://feed/{a}",
+                         "embedding_model": "m", "embedding_dim": 4})
+    return LocalVectorStore.from_arrays(tmp_path, np.array(vectors), meta)
+
+
+def test_search_returns_nearest_chunks_with_cosine_distance(store):
+    rows = store.search(TOPICS[0], k=3)
+    assert [(r[1], r[2]) for r in rows] == [("a0", 0), ("a0", 1), ("a2", 1)]
+    assert rows[0][7] == pytest.approx(1 - 1 / np.sqrt(1.01), abs=1e-6)  # float32 vectors
+    assert [r[7] for r in rows] == sorted(r[7] for r in rows)
+
+
+def test_search_articles_returns_distinct_articles(store):
+    rows = store.search_articles(TOPICS[0], k=2)
+    assert [r[1] for r in rows] == ["a0", "a2"]
+    rows = store.search_articles(TOPICS[0], k=2, chunks_per_article=2)
+    assert [(r[1], r[2]) for r in rows] == [("a0", 0), ("a0", 1), ("a2", 1), ("a2", 0)]
+
+
+def test_search_articles_mean_aggregate(store):
+    best = store.search_articles(TOPICS[0], k=1, agg="mean")[0]
+    chunks = store.search(TOPICS[0], k=2)
+    assert best[7] == pytest.approx(np.mean([r[7] for r in chunks]))
+    with pytest.raises(ValueError):
+        store.search_articles(TOPICS[0], agg="median")
+
+
+def test_search_two_stage_matches_article_search(store):
+    for topic in TOPICS:
+        two_stage = store.search_two_stage(topic, k=2)
+        assert [r[1] for r in two_stage] == [r[1] for r in store.search_articles(topic, k=2)]
+
+
+def test_filters(store):
+    def articles(**filters):
+        return {r[1] for r in store.search(TOPICS[0], k=6, **filters)}
+
+    assert articles(since="2025-05-10T00:00:00+00:00") == {"a1"}
+    assert articles(until="2025-05-10T00:00:00+00:00") == {"a0"}
+    assert articles(source_type="web") == {"a2"}
+    assert articles(source_link="https://feed/1") == {"a1"}
+    assert articles(embedding_model="other") == set()
+    # Undated rows never pass a date filter
+    assert "a2" not in articles(since="2000-01-01T00:00:00+00:00")
+    assert [r[1] for r in store.search_two_stage(TOPICS[0], k=2, source_type="RSS")] == ["a0", "a1"]
+
+
+def test_open_and_models(store, tmp_path):
+    again = LocalVectorStore.open(tmp_path)
+    assert again.models() == [("m", 4, None)]
+    assert again.search(TOPICS[1], k=1)[0][1] == "a1"
+
+
+def test_no_chunk_files_give_an_empty_store(tmp_path):
+    store = LocalVectorStore.build([], tmp_path)
+    assert store.vectors.shape[0] == 0 and store.vectors.ndim == 2
+    assert store.models() == []
+    q = TOPICS[0]
+    assert store.search(q) == store.search_articles(q) == store.search_two_stage(q) == []
+    assert len(LocalVectorStore.open(tmp_path).meta) == 0
@@ -0,0 +1,73 @@
+import pytest
+
+import retriever
+
+
+class StubCrossEncoder:
+    """Scores a chunk by the number in its text; records the batches it scores."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size):
+        self.batches.append(len(pairs))
+        return [float(text.split()[-1]) for _, text in pairs]
+
+
+def row(article, chunk, score):
+    return (0, article, chunk, "title", f"{article} chunk {chunk} scores {score}", None, "", 0.1)
+
+
+@pytest.fixture
+def ce(monkeypatch):
+    stub = StubCrossEncoder()
+    monkeypatch.setattr(retriever, "_cross_encoder", stub)
+    monkeypatch.setattr(retriever, "_ms_per_pair", None)
+    return stub
+
+
+def test_rerank_keeps_the_best_k_by_cross_encoder_score(ce):
+    rows = [row("a", 0, 1), row("b", 0, 5), row("c", 0, 3), row("d", 0, 9)]
+    assert [r[1] for r in retriever.rerank("q", rows, k=2, top_n=3, budget_ms=0)] == ["b", "c"]
+    assert ce.batches == [3]  # only the top_n kNN rows are scored
+
+
+def test_rerank_cuts_candidates_to_the_latency_budget(ce, monkeypatch):
+    rows = [row(str(i), 0, i) for i in range(20)]
+    monkeypatch.setattr(retriever, "_ms_per_pair", 10.0)
+    retriever.rerank("q", rows, k=2, top_n=20, budget_ms=50)
+    assert ce.batches[-1] == 5
+    # Never fewer candidates than results: k, or k articles' chunks
+    monkeypatch.setattr(retriever, "_ms_per_pair", 10.0)
+    retriever.rerank("q", rows, k=8, top_n=20, budget_ms=50)
+    assert ce.batches[-1] == 8
+    monkeypatch.setattr(retriever, "_ms_per_pair", 10.0)
+    retriever.rerank("q", rows, k=4, top_n=20, budget_ms=50, chunks_per_article=3)
+    assert ce.batches[-1] == 12
+
+
+def test_rerank_returns_k_articles_with_their_chunks(ce):
+    rows = [row("a", 0, 2), row("a", 1, 8), row("b", 0, 5), row("b", 1, 1),
+            row("c", 0, 9), row("c", 1, 3)]
+    out = retriever.rerank("q", rows, k=2, top_n=20, budget_ms=0, chunks_per_article=2)
+    assert [(r[1], r[2]) for r in out] == [("c", 0), ("c", 1), ("a", 1), ("a", 0)]
+
+
+class Store:
+    """Records the candidate count each search was asked for."""
+
+    def __init__(self, rows):
+        self.rows, self.asked = rows, []
+
+    def search_articles(self, q, k, chunks_per_article=1, **filters):
+        self.asked.append((k, chunks_per_article))
+        return self.rows[:k * chunks_per_article]
+
+
+def test_retrieve_fetches_top_n_candidates_for_rerank(ce):
+    store = Store([row(str(i), c, 10 * i + c) for i in range(30) for c in range(2)])
+    out = retriever.retrieve(store, "q", None, k=2, mode="articles", rerank_on=True,
+                             top_n=7, chunks_per_article=2)
+    assert store.asked == [(7, 2)]
+    assert ce.batches == [14]  # all chunks of the 7 candidate articles
+    assert len({r[1] for r in out}) == 2 and len(out) == 4
@@ -0,0 +1,145 @@
+'''
+Feed registry and poll schedule for the ingest daemon (pipeline.py --daemon)
+
+Every feed of scraper.FEEDS (SCRAPER_FEEDS) keeps its state in
+/data/feed_state.json: the entry links already ingested, the time of its
+last and next poll, and its expected new-article rate.
+
+Cadence: after each poll the rate is estimated from the published_at of
+every entry the feed lists (parse_date_safe() in scraper.py), not only the
+new ones:
+
+  rate = entries published in the last FEED_CADENCE_WINDOW_S
+         / time since the oldest of them (at least one hour)
+
+Counting up to now, rather than up to the newest entry, makes a feed that
+has gone quiet look slower with every poll. Feeds without usable dates
+fall back to the rate of new articles seen between polls (EWMA, weight
+FEED_RATE_ALPHA for the newest poll).
+
+Budget: FEED_POLL_BUDGET feed requests per hour are split between the
+feeds in proportion to their rates (allocate()). Each feed gets at least
+one poll per FEED_MAX_INTERVAL_S, taken from the others' shares, and at
+most one per FEED_MIN_INTERVAL_S; a busy feed's share above that is not
+spent, so slow feeds are not polled more just because budget is left.
+Feeds not polled yet count as one article per FEED_DEFAULT_INTERVAL_S.
+'''
+
+import json, os, pathlib
+
+FEED_STATE_PATH = pathlib.Path(os.environ.get("FEED_STATE_PATH", "/data/feed_state.json"))
+FEED_POLL_BUDGET = float(os.environ.get("FEED_POLL_BUDGET", "60"))   # feed requests per hour
+FEED_DEFAULT_INTERVAL_S = float(os.environ.get("FEED_DEFAULT_INTERVAL_S", "900"))
+FEED_MIN_INTERVAL_S = float(os.environ.get("FEED_MIN_INTERVAL_S", "120"))
+FEED_MAX_INTERVAL_S = float(os.environ.get("FEED_MAX_INTERVAL_S", "21600"))
+FEED_CADENCE_WINDOW_S = float(os.environ.get("FEED_CADENCE_WINDOW_S", str(14 * 86400)))
+FEED_RATE_ALPHA = float(os.environ.get("FEED_RATE_ALPHA", "0.3"))
+MIN_SPAN_S = 3600  # shorter spans overstate the rate of a feed that just posted
+SEEN_MAX = 2000    # entry links remembered per feed (feeds list far fewer)
+
+
+def cadence(published, now, window=FEED_CADENCE_WINDOW_S):
+    """Articles per second from entry publish times (datetimes), or None."""
+    ts = [d.timestamp() for d in published if d is not None]
+    recent = [t for t in ts if 0 <= now - t <= window]
+    if not ts:
+        return None
+    if not recent:
+        return 0.0
+    return len(recent) / max(now - min(recent), MIN_SPAN_S)
+
+
+def allocate(weights, budget, low, high):
+    """{key: share} of budget, proportional to weights, each within [low, high].
+
+    A share over high is cut to high and the excess stays unspent; a share
+    under low is raised to low at the others' expense. The rest of the
+    budget is split again among the keys left. When budget cannot give
+    every key low, every key gets low (the floor wins over the budget).
+    """
+    shares, free, left = {}, dict(weights), budget
+    while free:
+        total = sum(free.values())
+        proposal = {k: left * w / total if total > 0 else left / len(free) for k, w in free.items()}
+        bounded = {k: s for k, s in proposal.items() if not low <= s <= high}
+        if not bounded:
+            shares.update(proposal)
+            break
+        for k, s in bounded.items():
+            shares[k] = min(max(s, low), high)
+            left -= shares[k] if s < low else s
+            del free[k]
+    return shares
+
+
+class Feed:
+
+    def __init__(self, url, interval=FEED_DEFAULT_INTERVAL_S, next_poll=0.0, last_poll=None,
+                 rate=None, seen=()):
+        self.url = url
+        self.interval = interval
+        self.next_poll = next_poll
+        self.last_poll = last_poll
+        self.rate = rate          # expected new articles per second, None until polled
+        self.seen = list(seen)    # oldest first
+
+    def remember(self, links):
+        """Adds links to the ingested ones, keeping the newest SEEN_MAX."""
+        known = set(self.seen)
+        self.seen += [link for link in links if link not in known]
+        del self.seen[:-SEEN_MAX]
+
+    def observe(self, n_new, now, published=()):
+        """Updates the rate after a poll that found n_new articles.
+
+        published: publish times (datetimes, None if unparsed) of all entries listed.
+        """
+        rate = cadence(published, now)
+        if rate is None and self.last_poll is not None:
+            # No dates in this feed: new articles per second between polls
+            observed = n_new / max(now - self.last_poll, 1.0)
+            rate = observed if self.rate is None else \
+                FEED_RATE_ALPHA * observed + (1 - FEED_RATE_ALPHA) * self.rate
+        if rate is not None:
+            self.rate = rate
+        self.last_poll = now
+
+    def to_json(self):
+        return {"url": self.url, "interval": self.interval, "next_poll": self.next_poll,
+                "last_poll": self.last_poll, "rate": self.rate, "seen": self.seen}
+
+
+class FeedRegistry:
+    """The feeds to poll and their state; feeds no longer listed are dropped."""
+
+    def __init__(self, urls, path=FEED_STATE_PATH):
+        self.path = pathlib.Path(path)
+        state = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                state = {s["url"]: s for s in json.load(f)}
+        self.feeds = [Feed(**state[url]) if url in state else Feed(url) for url in urls]
+
+    def due(self, now):
+        return [feed for feed in self.feeds if feed.next_poll <= now]
+
+    def next_poll(self):
+        return min((feed.next_poll for feed in self.feeds), default=float("inf"))
+
+    def schedule(self, budget=FEED_POLL_BUDGET):
+        """Sets every feed's interval and next poll from its share of the budget."""
+        prior = 1 / FEED_DEFAULT_INTERVAL_S
+        rates = {feed.url: prior if feed.rate is None else feed.rate for feed in self.feeds}
+        shares = allocate(rates, budget / 3600, 1 / FEED_MAX_INTERVAL_S, 1 / FEED_MIN_INTERVAL_S)
+        for feed in self.feeds:
+            feed.interval = 1 / shares[feed.url]
+            if feed.last_poll is not None:
+                feed.next_poll = feed.last_poll + feed.interval
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump([feed.to_json() for feed in self.feeds], f)
+        os.replace(tmp, self.path)
+
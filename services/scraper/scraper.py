@@ -14,9 +14,16 @@ from urllib.parse import urlparse
 from dateutil import parser as dateparser
 
 
-import json, pathlib
+import json
 from pathlib import Path
 
+import logging
+
+from metrics import metrics
+from logs import get_logger, sampled, Progress
+
+log = get_logger("scraper")
+
 out = Path("/data/news.jsonl") # for docker-compose
 #out = Path("./news.jsonl") # for standalone
 
@@ -26,6 +33,8 @@ out.parent.mkdir(parents=True, exist_ok=True)
 
 import os
 FEED_URL = "https://news.harvard.edu/gazette/feed/"                     # 1 source
+# Feed registry for the ingest daemon (comma-separated URLs, see feeds.py)
+FEEDS = [u.strip() for u in os.environ.get("SCRAPER_FEEDS", FEED_URL).split(",") if u.strip()]
 TIMEOUT = 10.0
 USER_AGENT = "newsjuice-scraper/0.2 (+https://newsjuiceapp.com)"
 
@@ -76,52 +85,66 @@ def get_rss_text(url: str) -> str:
     r.raise_for_status()
     return r.text
 # ---------- Main minimal flow ----------
-def main():
+def scrape(feed_url=FEED_URL, seen=None, published=None):
+    """Articles of the feed (dicts, as written to news.jsonl).
+
+    seen: optional set of entry links already handled; those entries are not
+    fetched again, and the links handled now (articles and pages too short
+    to keep) are added to it. Failed fetches are retried next time.
+    published: optional list, receives the publish time of every entry the
+    feed lists (parse_date_safe(), None if missing), for feeds.cadence().
+    """
     try:
-        rss_text = get_rss_text(FEED_URL)
+        with metrics.time("fetch"):
+            rss_text = get_rss_text(feed_url)
     except Exception as e:
-        print(f"[rss-fetch-error] {FEED_URL} :: {e}")
-        return
+        log.error("rss fetch failed for %s :: %s", feed_url, e)
+        return []
 
     fp = feedparser.parse(rss_text)
-    print(f"[rss] status={getattr(fp, 'status', 'n/a')} bozo={getattr(fp, 'bozo', 0)} "
-          f"exc={getattr(fp, 'bozo_exception', None)}")
+    log.info("rss: status=%s bozo=%s exc=%s", getattr(fp, 'status', 'n/a'),
+             getattr(fp, 'bozo', 0), getattr(fp, 'bozo_exception', None))
 
     entries = list(getattr(fp, "entries", []))
-    print(f"[rss] entries={len(entries)}")
+    log.info("rss: %s entries=%d", feed_url, len(entries))
     if not entries:
-        print("[rss] first 400 chars (debug):")
-        print(rss_text[:400])
-        return
+        log.warning("rss: no entries, first 400 chars: %s", rss_text[:400])
+        return []
 
-    print(FEED_URL)
-    print("\nENTRY 0:", entries[0])
-    print("\nENTRY 9:", entries[9])
+    # Full feed entries are large; only dumped at LOG_LEVEL=DEBUG
+    log.debug("ENTRY 0: %s", entries[0])
 
-    inserted = 0
-    source_link = source_label(FEED_URL)
     fetched_at = datetime.now(timezone.utc)
     fetched_at = fetched_at.isoformat() if fetched_at else None
-    print("\ndatetime = ", datetime)            #exit()
 
 
     items = []
+    progress = Progress(log, "entries processed", total=len(entries))
 
     for e in entries:
+        progress.update()
+        if published is not None:
+            published.append(parse_date_safe(getattr(e, "published", None)))
         url = getattr(e, "link", None)
-        if not url:
+        if not url or (seen is not None and url in seen):
             continue
 
         # 3) Fetch page + extract
         try:
-            html = fetch_html_sync(url)
+            with metrics.time("fetch"):
+                html = fetch_html_sync(url)
         except Exception as ex:
-            print(f"[fetch-error] {url} :: {ex}")
+            sampled(log, logging.WARNING, "fetch-error", "fetch failed for %s :: %s", url, ex)
+            metrics.count("fetch_errors")
             continue
 
-        title_guess, content = extract_content_and_title(html)
+        with metrics.time("extract"):
+            title_guess, content = extract_content_and_title(html)
+        if seen is not None:
+            seen.add(url)
         if not content or len(content) < 200:
             # skip very short or empty pages
+            metrics.count("skipped_short")
             continue
 
         # Prefer feed title if present; else extracted title
@@ -141,15 +164,28 @@ def main():
             except Exception:
                 pass
         
-        item = {"author": author, "title" : title, "content": content, "published_at": published_at, "fetched_at": fetched_at, "source_link": FEED_URL, "source_type": "RSS", "summary":""}
+        item = {"author": author, "title" : title, "content": content, "published_at": published_at, "fetched_at": fetched_at, "link": url, "source_link": feed_url, "source_type": "RSS", "summary":""}
         items.append(item)
+    progress.done()
+    return items
+
 
-    with out.open("w", encoding="utf-8") as f:
+def write_news(items, path=out):
+    with path.open("w", encoding="utf-8") as f:
         count = 0
         for item in items:
             f.write(json.dumps(item, ensure_ascii=False) + "\n")
             count += 1
-        print("NUMBER OF NEWS SCRAPED: ", count)    
+        log.info("news scraped: %d", count)
+
+
+def main():
+    items = scrape()
+    if items:
+        write_news(items)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        metrics.finish()  # per-stage throughput summary, see metrics.py
\ No newline at end of file
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from feeds import MIN_SPAN_S, SEEN_MAX, Feed, FeedRegistry, allocate, cadence
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc).timestamp()
+HOUR = 3600
+
+
+def ago(seconds):
+    return datetime.fromtimestamp(NOW - seconds, tz=timezone.utc)
+
+
+def test_cadence_without_dates_is_unknown():
+    assert cadence([], NOW) is None
+    assert cadence([None, None], NOW) is None
+
+
+def test_cadence_counts_recent_entries_up_to_now():
+    published = [ago(2 * HOUR), ago(10 * HOUR), ago(20 * HOUR), None]
+    assert cadence(published, NOW) == pytest.approx(3 / (20 * HOUR))
+
+
+def test_cadence_of_quiet_feed_is_zero():
+    assert cadence([ago(30 * 86400)], NOW, window=14 * 86400) == 0.0
+
+
+def test_cadence_span_has_a_floor():
+    assert cadence([ago(60)], NOW) == pytest.approx(1 / MIN_SPAN_S)
+
+
+def test_allocate_is_proportional_within_bounds():
+    shares = allocate({"a": 1, "b": 3}, 4, 0, 10)
+    assert shares == pytest.approx({"a": 1, "b": 3})
+
+
+def test_allocate_leaves_excess_over_high_unspent():
+    shares = allocate({"a": 1, "b": 9}, 10, 0, 5)
+    assert shares == pytest.approx({"a": 1, "b": 5})
+
+
+def test_allocate_raises_low_shares_at_others_expense():
+    shares = allocate({"a": 0, "b": 10}, 10, 1, 100)
+    assert shares == pytest.approx({"a": 1, "b": 9})
+
+
+def test_allocate_floor_wins_over_budget():
+    assert allocate({"a": 1, "b": 1}, 1, 1, 5) == pytest.approx({"a": 1, "b": 1})
+
+
+def test_feed_remembers_newest_links():
+    feed = Feed("u")
+    feed.remember([f"l{i}" for i in range(SEEN_MAX)])
+    feed.remember(["l0", "new"])
+    assert len(feed.seen) == SEEN_MAX
+    assert feed.seen[-1] == "new" and "l0" not in feed.seen
+
+
+def test_feed_without_dates_falls_back_to_poll_rate():
+    feed = Feed("u", last_poll=NOW - 100)
+    feed.observe(5, NOW, published=[None])
+    assert feed.rate == pytest.approx(0.05)
+    assert feed.last_poll == NOW
+
+
+def test_registry_schedules_busy_feeds_more_often_and_round_trips(tmp_path):
+    path = tmp_path / "feed_state.json"
+    registry = FeedRegistry(["busy", "slow"], path=path)
+    for feed, rate in zip(registry.feeds, (10 / HOUR, 1 / (6 * HOUR))):
+        feed.rate, feed.last_poll = rate, NOW
+    registry.schedule(budget=60)
+    busy, slow = registry.feeds
+    assert busy.interval < slow.interval
+    assert busy.next_poll == pytest.approx(NOW + busy.interval)
+    registry.save()
+
+    again = FeedRegistry(["busy", "new"], path=path)
+    assert [f.url for f in again.feeds] == ["busy", "new"]
+    assert again.feeds[0].to_json() == busy.to_json()
+    assert again.feeds[1].rate is None
+    assert again.due(NOW) == [again.feeds[1]]
@@ -0,0 +1,98 @@
+'''
+Benchmark: time-to-first-token vs total time for the streamed briefing
+
+Uses the fake streaming model (llm.StubClient: first piece after --ttft
+seconds, then one word per --token-s seconds) on synthetic articles, and
+measures, for --runs runs each:
+
+  blocking   wait for the whole response (what the user saw before)
+  stream     stream_briefing() async generator, in process
+  sse        server.py over HTTP on localhost, timed by the reading client
+
+Reports median time to the first text and total time.
+
+Usage:
+  python bench_stream.py --ttft 0.3 --token-s 0.02 --runs 5
+'''
+
+import argparse, asyncio, os, statistics, tempfile, time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("METRICS_FORMAT", "off")
+
+from cache import FileSummaryCache
+from llm import StubClient
+from summarizer import stream_briefing
+
+SENTENCE = "The city council approved a new budget for public transport after a long debate."
+
+
+def synthetic_articles(n, sentences):
+    text = " ".join([SENTENCE] * sentences)
+    return [{"article_id": f"a{i}", "title": f"Article {i}", "source_link": "", "published_at": None,
+             "score": 0.0, "text": text, "chunks": {0: text}, "summary": text} for i in range(n)]
+
+
+async def blocking(client, articles):
+    t0 = time.perf_counter()
+    "".join([p async for p in stream_briefing("transport", articles, client)])
+    total = time.perf_counter() - t0
+    return total, total
+
+
+async def streamed(client, articles):
+    t0 = time.perf_counter()
+    first = None
+    async for _ in stream_briefing("transport", articles, client):
+        if first is None:
+            first = time.perf_counter() - t0
+    return first, time.perf_counter() - t0
+
+
+async def over_sse(port):
+    t0 = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /briefing?q=transport HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await writer.drain()
+    first = None
+    async for line in reader:
+        if first is None and line.startswith(b"data:") and b'"text"' in line:
+            first = time.perf_counter() - t0
+    writer.close()
+    return first, time.perf_counter() - t0
+
+
+async def run(args):
+    from server import serve
+    client = StubClient(sentences=args.sentences, ttft_s=args.ttft, token_s=args.token_s)
+    articles = synthetic_articles(args.articles, args.sentences)
+    cache = FileSummaryCache(os.path.join(tempfile.mkdtemp(), "summary_cache.jsonl"))
+    server = await serve(cache, 0, client=client, load_articles=lambda: [dict(a) for a in articles])
+    port = server.sockets[0].getsockname()[1]
+
+    modes = {"blocking": lambda: blocking(client, articles),
+             "stream": lambda: streamed(client, articles),
+             "sse": lambda: over_sse(port)}
+    print(f"[bench] fake model: first piece {args.ttft * 1000:.0f} ms, "
+          f"{args.token_s * 1000:.0f} ms/word, {args.runs} runs")
+    print(f"{'mode':<9} {'first text ms':>14} {'total ms':>9}")
+    for name, fn in modes.items():
+        results = [await fn() for _ in range(args.runs)]
+        first = statistics.median(r[0] for r in results) * 1000
+        total = statistics.median(r[1] for r in results) * 1000
+        print(f"{name:<9} {first:>14.0f} {total:>9.0f}")
+    server.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--ttft", type=float, default=0.3, help="fake model: seconds to the first piece")
+    ap.add_argument("--token-s", type=float, default=0.02, help="fake model: seconds per word")
+    ap.add_argument("--sentences", type=int, default=6, help="length of the fake response")
+    ap.add_argument("--articles", type=int, default=2)
+    ap.add_argument("--runs", type=int, default=5)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+'''
+Context packing: retrieved chunks -> article texts that fit a token budget
+
+Takes the retriever's result records (results.py) in rank order, with
+score = cosine distance (lower = closer). pack_context():
+
+1. drops the low-score tail: rows whose score is more than CONTEXT_MAX_GAP
+   above the best row's (the best article is always kept)
+2. groups the rows into articles, in rank order, and orders each article's
+   chunks by chunk_index
+3. removes repeated text: the overlap between consecutive chunks of an
+   article (the loader's character splitter repeats 20 characters) and
+   chunks whose text was already packed (e.g. syndicated copies)
+4. adds chunks in rank order until CONTEXT_TOKEN_BUDGET tokens (tokens.py
+   estimate) are used; the chunk that crosses the budget is cut at a
+   sentence/word boundary, everything after it is left out
+
+join_chunks() rebuilds a whole article from all its chunks the same way
+(overlaps removed), for the per-article summaries.
+
+CONTEXT_TOKEN_BUDGET ---- token budget for all article texts, and for the
+                          briefing prompt (summarizer.py; default 3000)
+CONTEXT_MAX_GAP      ---- max score distance from the best row (default 0.15;
+                          empty = keep all)
+'''
+
+import os
+
+from tokens import count_tokens, truncate
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_MAX_GAP = os.environ.get("CONTEXT_MAX_GAP", "0.15")
+MAX_OVERLAP = 64   # longest chunk overlap looked for, in characters
+MIN_OVERLAP = 8    # shorter matches are likely chance
+
+
+def drop_tail(rows, max_gap):
+    """Rows within max_gap of the best score (rows keep their rank order)."""
+    scored = [r["score"] for r in rows if isinstance(r.get("score"), (int, float))]
+    if max_gap is None or not scored:
+        return rows
+    best = min(scored)
+    keep = [r for r in rows if not isinstance(r.get("score"), (int, float)) or r["score"] <= best + max_gap]
+    return keep or rows[:1]
+
+
+def strip_overlap(previous, text, max_overlap=MAX_OVERLAP, min_overlap=MIN_OVERLAP):
+    """text without its longest prefix that is also a suffix of previous."""
+    for n in range(min(max_overlap, len(previous), len(text)), min_overlap - 1, -1):
+        if previous.endswith(text[:n]):
+            return text[n:]
+    return text
+
+
+def add(pieces, text, contiguous):
+    """Appends text, gluing it to the last piece when it continues it."""
+    if contiguous and pieces:
+        pieces[-1] += text
+    else:
+        pieces.append(text)
+
+
+def join_chunks(chunks):
+    """Article text from its {chunk_index: text}, overlaps between consecutive chunks removed."""
+    pieces, previous, previous_index = [], "", None
+    for index in sorted(chunks):
+        text = chunks[index]
+        contiguous = False
+        if previous_index is not None and index == previous_index + 1:
+            stripped = strip_overlap(previous, text)
+            contiguous = len(stripped) < len(text)
+            text = stripped
+        previous, previous_index = chunks[index], index
+        add(pieces, text, contiguous)
+    return " ".join(p.strip() for p in pieces if p.strip())
+
+
+def pack_context(rows, budget=CONTEXT_TOKEN_BUDGET, max_gap=CONTEXT_MAX_GAP):
+    """Articles (dicts with "text" and "n_tokens") packed under budget tokens."""
+    if isinstance(max_gap, str):
+        max_gap = float(max_gap) if max_gap else None
+    rows = drop_tail(rows, max_gap)
+
+    articles = {}
+    for row in rows:
+        meta = row.get("metadata") or {}
+        article = articles.setdefault(row["article_id"], {
+            "article_id": row["article_id"], "title": meta.get("title") or "",
+            "source_link": meta.get("source_link") or "", "published_at": meta.get("published_at"),
+            "score": row["score"], "chunks": {}})
+        article["chunks"][row["chunk_index"]] = row["text"]
+
+    packed, seen = [], set()
+    left = budget
+    for article in articles.values():
+        pieces, previous, previous_index = [], "", None
+        for index in sorted(article["chunks"]):
+            text = article["chunks"][index]
+            key = " ".join(text.split())
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            contiguous = False
+            if previous_index is not None and index == previous_index + 1:
+                stripped = strip_overlap(previous, text)
+                contiguous = len(stripped) < len(text)  # continues the previous chunk
+                text = stripped
+            previous, previous_index = article["chunks"][index], index
+
+            n = count_tokens(text)
+            if n > left:
+                # Cut the crossing chunk at a sentence/word boundary
+                text = truncate(text, left)
+                if text:
+                    add(pieces, text, contiguous)
+                left = 0
+                break
+            add(pieces, text, contiguous)
+            left -= n
+        if pieces:
+            article["text"] = " ".join(p.strip() for p in pieces)
+            article["n_tokens"] = count_tokens(article["text"])
+            packed.append(article)
+        if left <= 0:
+            break
+    return packed
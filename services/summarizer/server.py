@@ -0,0 +1,118 @@
+'''
+Streaming briefing endpoint (Server-Sent Events)
+
+GET /briefing?q=<preferences>
+
+Reads the current retriever results, summarizes the articles (precomputed,
+cached or generated, see summarizer.py) and streams the briefing while the
+model generates it, one event per text piece:
+
+    data: {"text": "..."}
+
+and a last event with the timings:
+
+    event: done
+    data: {"ttft_ms": ..., "total_ms": ...}
+
+or, when the briefing fails part-way (results, cache or model error):
+
+    event: error
+    data: {"error": "..."}
+
+Plain asyncio streams, no web framework; the response ends by closing the
+connection. Blocking work (reading the results, the stored chunks and the
+summary cache) runs in worker threads, so one request does not hold up the
+streams of the others.
+
+SUMMARIZER_PORT ---- port to listen on (default 8080)
+
+Usage:
+  python server.py
+  curl -N "http://localhost:8080/briefing?q=science"
+'''
+
+import asyncio, json, os, time
+from urllib.parse import parse_qs, urlsplit
+
+from cache import open_cache
+from llm import get_client
+from logs import get_logger
+from summarizer import read_context, stream_briefing, summarize_articles
+
+log = get_logger("server")
+
+SUMMARIZER_PORT = int(os.environ.get("SUMMARIZER_PORT", "8080"))
+
+
+def sse(data, event=None):
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def make_handler(client, cache, load_articles=read_context):
+
+    async def handle(reader, writer):
+        briefing, streaming = None, False
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # headers are not used
+            url = urlsplit(request_line[1]) if len(request_line) > 1 else None
+            if url is None or request_line[0] != "GET" or url.path != "/briefing":
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+
+            t0 = time.perf_counter()
+            briefing = parse_qs(url.query).get("q", [""])[0]
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            streaming = True
+            await writer.drain()
+
+            # File and DB reads run in a worker thread, not on the event loop
+            articles = await asyncio.to_thread(load_articles)
+            await summarize_articles(articles, client, cache)
+            ttft = None
+            async for piece in stream_briefing(briefing, articles, client):
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+                writer.write(sse({"text": piece}))
+                await writer.drain()
+            total = time.perf_counter() - t0
+            writer.write(sse({"ttft_ms": (ttft or total) * 1000, "total_ms": total * 1000}, event="done"))
+            log.info("briefing %r: first piece %.0f ms, total %.0f ms", briefing, (ttft or total) * 1000, total * 1000)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        except Exception as ex:
+            log.error("briefing %r failed :: %s: %s", briefing, ex.__class__.__name__, ex)
+            if streaming:
+                writer.write(sse({"error": f"{ex.__class__.__name__}: {ex}"}, event="error"))
+            else:
+                writer.write(b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\n"
+                             b"Connection: close\r\n\r\n")
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    return handle
+
+
+async def serve(cache, port=SUMMARIZER_PORT, client=None, **kwargs):
+    handler = make_handler(client or get_client(), cache, **kwargs)
+    return await asyncio.start_server(handler, "0.0.0.0", port)
+
+
+async def main():
+    with open_cache() as cache:
+        server = await serve(cache)
+        log.info("serving /briefing on port %d", SUMMARIZER_PORT)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
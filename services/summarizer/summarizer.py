@@ -1,16 +1,231 @@
 '''
 Summarizer service
 
-Takes the top 2 articles in artifacts folder 
-and calls LLM for summarization
+Takes the articles retrieved for a briefing (artifacts folder),
+and calls the LLM for summarization
 
-Input: 
-./artifacts/2_best.txt        --- 2 best articles retrieved from DB
-./artifacts/preferences.txt   --- list of preferences/briefing from user 
+Input:
+./artifacts/top-2.jsonl       --- chunks retrieved from the vector DB (retriever.py, results.py)
+./artifacts/preferences.txt   --- list of preferences/briefing from user (optional)
 
-Outputs: 
+Outputs:
 ./artifacts/summary.txt       ---- summary of best articles
 
+The retrieved chunks are packed into article texts under a token budget
+(context.py: low-score tail dropped, chunk overlaps removed), which picks
+the articles of the briefing. Each article is then summarized from its
+full text, rebuilt from all its stored chunks (chunks_vector, or the chunk
+files without a database), not from the chunks this query retrieved.
+Articles whose summary was precomputed by the loader (chunks_vector.summary)
+are used as they are, without a model call. The others are summarized on
+their own, independently of the briefing, so the summary can be cached by
+(full-text hash, PROMPT_VERSION, model) and reused for every user and query
+(cache.py). Each article text is cut to SUMMARY_INPUT_TOKENS and the
+briefing prompt to CONTEXT_TOKEN_BUDGET, so no prompt outgrows its budget.
+Cache misses are summarized concurrently, at most
+SUMMARIZER_CONCURRENCY calls in flight; the client is pluggable (llm.py,
+SUMMARIZER_CLIENT=stub for a local stand-in).
+
+The briefing itself (article summaries combined for the user's preferences)
+is streamed: stream_briefing() is an async generator of text pieces as the
+model produces them, printed as they arrive here and served as Server-Sent
+Events by server.py, so the wait is the time to the first token, not the
+whole generation.
 '''
 
-print("DUMMY SUMMARIZER")
+import asyncio, json, os, pathlib, time
+
+from cache import open_cache, PgSummaryCache
+from context import CONTEXT_TOKEN_BUDGET, join_chunks, pack_context
+from llm import ARTICLE_MARKER, get_client, summarize_all
+from logs import get_logger
+from metrics import metrics
+from results import read_results, RESULTS_PATH
+from tokens import count_tokens, truncate
+
+log = get_logger("summarizer")
+
+PATH_TO_PREFERENCES = pathlib.Path("/data/preferences.txt")
+PATH_TO_SUMMARY = pathlib.Path("/data/summary.txt")
+PATH_TO_CHUNKS = pathlib.Path("/data/chunked_articles")
+SUMMARIZER_STREAM = os.environ.get("SUMMARIZER_STREAM", "1") == "1"
+
+BRIEFING_PROMPT = (
+    "Write a short news briefing for a reader interested in: {briefing}\n"
+    "Use only the article summaries below and name each article's title.\n\n"
+    + ARTICLE_MARKER + "{summaries}"
+)
+
+
+def build_context(records):
+    """Result records packed into articles under the context token budget.
+
+    records come from read_results() or, in process, straight from the
+    retriever (results.to_records()).
+    """
+    articles = pack_context(records)
+    log.info("context: %d rows (~%d tokens) -> %d articles, ~%d tokens",
+             len(records), sum(count_tokens(r["text"]) for r in records),
+             len(articles), sum(a["n_tokens"] for a in articles))
+    return articles
+
+
+def read_context(path=RESULTS_PATH):
+    return build_context(read_results(path))
+
+
+def stored_articles(article_ids, cache, chunks_dir=PATH_TO_CHUNKS):
+    """{article_id: ({chunk_index: text}, summary)} of every stored chunk of the articles.
+
+    From chunks_vector with the DB cache, else from the chunk files.
+    """
+    found = {}
+    if not article_ids:
+        return found
+    if isinstance(cache, PgSummaryCache):
+        with cache.conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT article_id, chunk_index, chunk, summary FROM chunks_vector
+                WHERE article_id = ANY(%s);
+                """,
+                (list(article_ids),),
+            )
+            rows = cur.fetchall()
+    else:
+        wanted, rows = set(article_ids), []
+        for fp in sorted(chunks_dir.glob("*.jsonl")) if chunks_dir.is_dir() else []:
+            with fp.open("r", encoding="utf-8") as f:
+                for line in f:
+                    # Cheap test first: most lines belong to other articles
+                    if line.strip() and any(a in line for a in wanted):
+                        obj = json.loads(line)
+                        if obj.get("article_id") in wanted:
+                            rows.append((obj["article_id"], obj.get("chunk_index"),
+                                         obj.get("chunk", ""), obj.get("summary", "")))
+    for article_id, index, text, summary in rows:
+        chunks, previous = found.get(article_id, ({}, ""))
+        chunks[int(index)] = text or ""
+        found[article_id] = (chunks, previous or summary or "")
+    return found
+
+
+async def summarize_articles(articles, client, cache):
+    """Adds "summary" to each article: precomputed, cached, or generated.
+
+    Summaries are of the full article (all its stored chunks), so they and
+    their cache key do not depend on which chunks the query retrieved. An
+    article not found in storage falls back to its packed text.
+    """
+    stored = await asyncio.to_thread(stored_articles, [a["article_id"] for a in articles], cache)
+    precomputed, todo, texts = {}, [], []
+    for article in articles:
+        chunks, summary = stored.get(article["article_id"], ({}, ""))
+        if summary:
+            precomputed[article["article_id"]] = summary
+            continue
+        todo.append(article)
+        texts.append(join_chunks(chunks) if chunks else article["text"])
+    n_missing = sum(a["article_id"] not in stored for a in articles)
+    if n_missing:
+        log.warning("summaries: %d articles not in storage, summarized from retrieved chunks", n_missing)
+
+    generated = await summarize_all([(a["title"], text) for a, text in zip(todo, texts)],
+                                    client, cache, on_call=lambda: metrics.time("summarize"))
+    for article in articles:
+        article["summary"] = precomputed.get(article["article_id"])
+    for article, summary in zip(todo, generated):
+        article["summary"] = summary
+    log.info("summaries: %d precomputed, %d from cache or model", len(precomputed), len(todo))
+    return articles
+
+
+def build_briefing_prompt(briefing, articles, budget=CONTEXT_TOKEN_BUDGET):
+    """Briefing prompt of at most budget tokens.
+
+    The user's preferences get at most a quarter of the budget; summaries are
+    added in rank order, the one that crosses the budget is cut and the rest
+    left out.
+    """
+    briefing = truncate(briefing or "general news", budget // 4)
+    left = budget - count_tokens(BRIEFING_PROMPT.format(briefing=briefing, summaries=""))
+    summaries = []
+    for article in articles:
+        text = truncate(f"{article['title']}: {article['summary'] or ''}", left)
+        if not text:
+            break
+        summaries.append(text)
+        left -= count_tokens(text)
+    if len(summaries) < len(articles):
+        log.info("briefing prompt: %d of %d article summaries fit %d tokens",
+                 len(summaries), len(articles), budget)
+    return BRIEFING_PROMPT.format(briefing=briefing, summaries="\n\n".join(summaries))
+
+
+async def stream_briefing(briefing, articles, client):
+    """Async generator of briefing text pieces, as the model produces them."""
+    t0 = time.perf_counter()
+    first = True
+    async for piece in client.stream(build_briefing_prompt(briefing, articles)):
+        if first:
+            metrics.observe("briefing_ttft", time.perf_counter() - t0)
+            first = False
+        yield piece
+    metrics.observe("briefing", time.perf_counter() - t0)
+
+
+async def print_briefing(briefing, articles, client):
+    """Prints the briefing as it streams (or at once); returns the full text."""
+    pieces = []
+    if SUMMARIZER_STREAM:
+        async for piece in stream_briefing(briefing, articles, client):
+            print(piece, end="", flush=True)
+            pieces.append(piece)
+    else:
+        with metrics.time("briefing"):
+            pieces.append(await client.generate(build_briefing_prompt(briefing, articles)))
+        print(pieces[0], end="")
+    print()
+    return "".join(pieces)
+
+
+def write_summary(briefing, articles, text="", path=PATH_TO_SUMMARY):
+    with path.open("w", encoding="utf-8") as f:
+        if briefing:
+            f.write(f"BRIEFING: {briefing}\n\n")
+        if text:
+            f.write(f"{text}\n\n")
+        for article in articles:
+            summary = article["summary"] or "(summary unavailable)"
+            f.write(f"{article['title']}\n{article['source_link']}\n{summary}\n\n")
+
+
+def brief(articles, briefing=""):
+    """Summarizes packed articles, prints and writes the briefing; returns its text."""
+    async def summarize_and_brief():
+        client = get_client()
+        with open_cache() as cache:
+            await summarize_articles(articles, client, cache)
+        return await print_briefing(briefing, articles, client)
+
+    text = asyncio.run(summarize_and_brief())
+    write_summary(briefing, articles, text)
+    log.info("wrote %d article summaries to %s", len(articles), PATH_TO_SUMMARY)
+    return text
+
+
+def main():
+    briefing = PATH_TO_PREFERENCES.read_text(encoding="utf-8").strip() \
+        if PATH_TO_PREFERENCES.exists() else ""
+    articles = read_context()
+    if not articles:
+        log.warning("no retrieved articles in %s", RESULTS_PATH)
+        return
+    brief(articles, briefing)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        metrics.finish()  # per-stage throughput summary, see metrics.py
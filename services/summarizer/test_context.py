@@ -0,0 +1,65 @@
+from context import drop_tail, join_chunks, pack_context, strip_overlap
+from tokens import count_tokens
+
+ARTICLE = ("The council approved the new budget on Monday. Spending on schools rises "
+           "by four percent. Road repairs are delayed until spring. The mayor called "
+           "the vote a fair compromise.")
+
+
+def split(text, size=60, overlap=20):
+    """Character chunks with overlap, like the loader's char-split."""
+    return [text[i:i + size] for i in range(0, len(text) - overlap, size - overlap)]
+
+
+def row(article_id, index, text, score, title="t"):
+    return {"article_id": article_id, "chunk_index": index, "text": text, "score": score,
+            "metadata": {"title": title, "source_link": f"https://x/{article_id}",
+                         "published_at": None}}
+
+
+def test_drop_tail_keeps_rows_near_the_best():
+    rows = [row("a", 0, "x", 0.20), row("b", 0, "y", 0.30), row("c", 0, "z", 0.50)]
+    assert [r["article_id"] for r in drop_tail(rows, 0.15)] == ["a", "b"]
+    assert drop_tail(rows, None) == rows
+
+
+def test_strip_overlap():
+    assert strip_overlap("the quick brown fox", "brown fox jumps") == " jumps"
+    assert strip_overlap("abc", "xyz") == "xyz"
+    # Matches shorter than MIN_OVERLAP are chance, not overlap
+    assert strip_overlap("it is", "is it") == "is it"
+
+
+def test_join_chunks_rebuilds_the_article():
+    chunks = dict(enumerate(split(ARTICLE)))
+    assert join_chunks(chunks) == ARTICLE
+    shuffled = {i: chunks[i] for i in reversed(chunks)}
+    assert join_chunks(shuffled) == ARTICLE
+
+
+def test_pack_context_groups_orders_and_removes_overlap():
+    chunks = split(ARTICLE)
+    rows = [row("a", i, c, 0.1 + i / 100) for i, c in reversed(list(enumerate(chunks)))]
+    rows.append(row("b", 0, "Other story.", 0.12, title="b"))
+    packed = pack_context(rows, budget=10_000, max_gap=None)
+    assert [a["article_id"] for a in packed] == ["a", "b"]
+    assert packed[0]["text"] == ARTICLE
+    assert packed[0]["n_tokens"] == count_tokens(ARTICLE)
+    assert packed[1]["source_link"] == "https://x/b"
+
+
+def test_pack_context_skips_repeated_chunks():
+    rows = [row("a", 0, "Same syndicated paragraph here.", 0.1),
+            row("b", 3, "Same  syndicated paragraph here.", 0.2),
+            row("b", 5, "Only in b.", 0.2)]
+    packed = pack_context(rows, budget=10_000, max_gap=None)
+    assert [a["text"] for a in packed] == ["Same syndicated paragraph here.", "Only in b."]
+
+
+def test_pack_context_respects_the_budget():
+    rows = [row(str(i), 0, ARTICLE, 0.1) for i in range(5)]
+    budget = count_tokens(ARTICLE) + 10
+    packed = pack_context([dict(r, text=r["text"] + f" Story {i}.") for i, r in enumerate(rows)],
+                          budget=budget, max_gap=None)
+    assert sum(a["n_tokens"] for a in packed) <= budget
+    assert len(packed) == 2  # second article cut at a boundary, the rest left out
@@ -0,0 +1,72 @@
+import asyncio, json
+
+from cache import FileSummaryCache
+from llm import StubClient
+from server import serve
+
+ARTICLE = {"article_id": "a1", "title": "Budget", "source_link": "https://x/a1", "published_at": None,
+           "score": 0.1, "text": "The council approved the budget. Schools get more. Roads wait."}
+
+
+class BrokenStream(StubClient):
+    """Stub whose briefing stream fails after the first piece."""
+
+    async def stream(self, prompt):
+        yield "Partial"
+        raise RuntimeError("model went away")
+
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    raw = (await reader.read()).decode("utf-8")
+    writer.close()
+    return raw
+
+
+def events(raw):
+    """[(event, data)] of an SSE response body."""
+    body = raw.split("\r\n\r\n", 1)[1]
+    out = []
+    for block in filter(None, body.split("\n\n")):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        out.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return out
+
+
+def request(tmp_path, path, client=None, load_articles=lambda: [dict(ARTICLE)]):
+    async def run():
+        server = await serve(FileSummaryCache(tmp_path / "cache.jsonl"), 0,
+                             client=client or StubClient(ttft_s=0, token_s=0),
+                             load_articles=load_articles)
+        async with server:
+            return await get(server.sockets[0].getsockname()[1], path)
+    return asyncio.run(run())
+
+
+def test_briefing_streams_text_then_done(tmp_path):
+    raw = request(tmp_path, "/briefing?q=budget")
+    assert raw.startswith("HTTP/1.1 200 OK\r\n") and "text/event-stream" in raw
+    got = events(raw)
+    assert [e for e, _ in got[:-1]] == ["message"] * (len(got) - 1) and len(got) > 2
+    assert "".join(d["text"] for _, d in got[:-1]) == "Budget: The council approved the budget. Schools get more."
+    assert got[-1][0] == "done" and got[-1][1]["total_ms"] >= got[-1][1]["ttft_ms"]
+
+
+def test_failure_before_the_briefing_is_an_error_event(tmp_path):
+    def fail():
+        raise FileNotFoundError("no results")
+
+    assert events(request(tmp_path, "/briefing", load_articles=fail)) == [
+        ("error", {"error": "FileNotFoundError: no results"})]
+
+
+def test_failure_mid_stream_ends_with_an_error_event(tmp_path):
+    got = events(request(tmp_path, "/briefing", client=BrokenStream(ttft_s=0, token_s=0)))
+    assert got == [("message", {"text": "Partial"}),
+                   ("error", {"error": "RuntimeError: model went away"})]
+
+
+def test_unknown_path_is_404(tmp_path):
+    assert request(tmp_path, "/other").startswith("HTTP/1.1 404 Not Found\r\n")
@@ -0,0 +1,20 @@
+from summarizer import build_briefing_prompt
+from tokens import count_tokens
+
+SUMMARY = ("The council approved the new budget on Monday. Spending on schools rises "
+           "by four percent. Road repairs are delayed until spring.")
+
+
+def test_briefing_prompt_stays_within_budget():
+    articles = [{"title": f"Story {i}", "summary": SUMMARY} for i in range(50)]
+    prompt = build_briefing_prompt("science " * 500, articles, budget=400)
+    assert count_tokens(prompt) <= 400
+    assert "Story 0: " + SUMMARY in prompt
+    assert "Story 49" not in prompt
+
+
+def test_briefing_prompt_keeps_everything_that_fits():
+    articles = [{"title": "A", "summary": SUMMARY}, {"title": "B", "summary": None}]
+    prompt = build_briefing_prompt("", articles, budget=3000)
+    assert "general news" in prompt
+    assert prompt.endswith("A: " + SUMMARY + "\n\nB: ")
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from pipeline import ROOT, ServiceModules, Stage, run_dag, select
+
+
+def test_run_dag_passes_dependency_results():
+    stages = [Stage("a", lambda _: 1),
+              Stage("b", lambda i: i["a"] + 1, deps=("a",)),
+              Stage("c", lambda i: i["a"] + i["b"], deps=("a", "b"))]
+    assert run_dag(stages) == {"a": 1, "b": 2, "c": 3}
+    assert run_dag(stages, parallel=False) == {"a": 1, "b": 2, "c": 3}
+
+
+def test_run_dag_runs_independent_stages_in_parallel():
+    # Both stages must be running at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    stages = [Stage("x", lambda _: barrier.wait()), Stage("y", lambda _: barrier.wait())]
+    assert set(run_dag(stages)) == {"x", "y"}
+
+
+def test_run_dag_stops_after_a_failure():
+    ran = []
+
+    def fail(_):
+        raise RuntimeError("boom")
+
+    stages = [Stage("a", fail), Stage("b", lambda _: ran.append("b"), deps=("a",))]
+    with pytest.raises(RuntimeError, match="boom"):
+        run_dag(stages)
+    assert ran == []
+
+
+def test_run_dag_rejects_unknown_dependencies():
+    with pytest.raises(ValueError, match="unknown stage"):
+        run_dag([Stage("a", lambda _: 1, deps=("missing",))])
+
+
+def test_select_drops_dependencies_on_stages_left_out():
+    stages = [Stage("a", lambda _: 1), Stage("b", lambda i: i.get("a", 0) + 1, deps=("a",))]
+    picked = select(stages, {"b"})
+    assert [(s.name, s.deps) for s in picked] == [("b", ())]
+    assert run_dag(picked) == {"b": 1}
+
+
+def test_select_rejects_unknown_stage_names():
+    with pytest.raises(ValueError, match="unknown stage"):
+        select([Stage("a", lambda _: 1)], {"a", "typo"})
+
+
+def test_service_modules_resolve_to_their_own_files():
+    finder = ServiceModules()
+    assert finder.paths["schema"] == ROOT / "services" / "loader" / "schema.py"
+    assert finder.paths["results"] == ROOT / "services" / "common" / "results.py"
+    assert finder.find_spec("schema", path=["elsewhere"]) is None  # submodules are not ours
+
+
+def test_service_modules_reject_a_name_in_two_services(tmp_path, monkeypatch):
+    for service in ("one", "two"):
+        (tmp_path / "services" / service).mkdir(parents=True)
+        (tmp_path / "services" / service / "schema.py").write_text("")
+    monkeypatch.setattr("pipeline.ROOT", tmp_path)
+    with pytest.raises(ImportError, match="'schema' is defined in both one and two"):
+        ServiceModules(("one", "two"))